@@ -0,0 +1,201 @@
+"""
+    Phân tích hàng loạt thế cờ từ file EPD/FEN hoặc PGN trên nhiều tiến trình.
+    Thế cờ được đọc dần bằng generator và chỉ có tối đa in_flight thế cờ đang chờ xử lý,
+    nên bộ nhớ không tăng theo kích thước file. Mỗi tiến trình dùng lại một Engine cho mọi
+    thế cờ nó nhận, nhưng xoá bảng chuyển vị, killer và history trước mỗi thế cờ, nên kết quả
+    (với --depth) không phụ thuộc tiến trình nào đã phân tích thế cờ nào trước đó. Kết quả ghi ra
+    JSONL, theo thứ tự đầu vào hoặc theo thứ tự xong trước; --resume bỏ qua các thế cờ đã có kết quả.
+
+        python batch.py positions.epd -o results.jsonl --depth 6 --workers 4
+        python batch.py games.pgn -o results.jsonl --movetime 0.5 --unordered --resume
+"""
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import chess
+import chess.pgn
+
+import minmax
+from timeman import TimeManager
+
+_engine = None
+_settings = None
+
+
+def _parse_fen_or_epd(line):
+    """Dòng FEN đầy đủ (có hai bộ đếm nước) hoặc EPD; trả về (board, id hoặc None)."""
+    parts = line.split()
+    if len(parts) == 6 and parts[4].isdigit() and parts[5].isdigit():
+        return chess.Board(line), None
+    board, operations = chess.Board.from_epd(line)
+    return board, operations.get("id")
+
+
+def read_positions(path):
+    """Sinh lần lượt (index, id, fen) từ file .pgn (mọi thế cờ trên nhánh chính) hoặc EPD/FEN."""
+    index = 0
+    if path.lower().endswith(".pgn"):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            game_number = 0
+            while True:
+                game = chess.pgn.read_game(f)
+                if game is None:
+                    break
+                game_number += 1
+                board = game.board()
+                for ply, move in enumerate(game.mainline_moves()):
+                    yield index, f"game{game_number}:ply{ply}", board.fen()
+                    index += 1
+                    board.push(move)
+                if not board.is_game_over():
+                    yield index, f"game{game_number}:ply{len(board.move_stack)}", board.fen()
+                    index += 1
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                board, position_id = _parse_fen_or_epd(line)
+                yield index, position_id or str(index), board.fen()
+                index += 1
+
+
+def _worker_init(settings):
+    global _engine, _settings
+    _engine = minmax.Engine(settings['hash_mb'])
+    _settings = settings
+
+
+def analyse_position(task, engine=None, settings=None):
+    """Phân tích một thế cờ (index, id, fen); trả về dict kết quả để ghi JSONL."""
+    engine = engine or _engine
+    settings = settings or _settings
+    index, position_id, fen = task
+    board = chess.Board(fen)
+    engine.new_game()
+    manager = TimeManager(movetime=settings['movetime']) if settings['movetime'] else TimeManager()
+    start = time.perf_counter()
+    result = engine.search(board, settings['depth'], manager=manager)
+    return {
+        'index': index,
+        'id': position_id,
+        'fen': fen,
+        'bestmove': result.move.uci() if result.move else None,
+        'score': result.score,
+        'depth': result.depth,
+        'nodes': result.nodes,
+        'pv': [move.uci() for move in result.pv],
+        'time': round(time.perf_counter() - start, 3),
+    }
+
+
+def analyse_stream(positions, depth=6, movetime=None, workers=None, in_flight=None, ordered=True,
+                   hash_mb=minmax.HASH_MB):
+    """
+        Sinh kết quả cho từng (index, id, fen) trong positions. Chỉ giữ tối đa in_flight thế cờ
+        đã gửi mà chưa có kết quả. ordered=True trả kết quả theo thứ tự đầu vào.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    in_flight = in_flight or workers * 2
+    settings = {'depth': depth, 'movetime': movetime, 'hash_mb': hash_mb}
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_worker_init,
+                             initargs=(settings,)) as executor:
+        pending = collections.deque() if ordered else set()
+        try:
+            for task in positions:
+                if len(pending) >= in_flight:
+                    yield from _drain(pending, ordered)
+                future = executor.submit(analyse_position, task)
+                if ordered:
+                    pending.append(future)
+                else:
+                    pending.add(future)
+            while pending:
+                yield from _drain(pending, ordered)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _drain(pending, ordered):
+    """Chờ ít nhất một kết quả: thế cờ cũ nhất (ordered) hoặc bất kỳ thế cờ nào xong trước."""
+    if ordered:
+        yield pending.popleft().result()
+    else:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.remove(future)
+            yield future.result()
+
+
+def completed_indices(path):
+    """
+        Các index đã có trong file kết quả (để resume). Dòng cuối bị ghi dở khi bị ngắt
+        giữa chừng được cắt bỏ để có thể ghi tiếp vào file.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    valid_size = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)['index'])
+            except (ValueError, KeyError):
+                break
+            valid_size += len(line)
+    if valid_size != os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(valid_size)
+    return done
+
+
+def analyse_file(input_path, output_path, depth=6, movetime=None, workers=None, in_flight=None,
+                 ordered=True, resume=False, hash_mb=minmax.HASH_MB, on_result=None):
+    """Phân tích input_path và ghi JSONL vào output_path; trả về số thế cờ đã phân tích lần này."""
+    done = completed_indices(output_path) if resume else set()
+    positions = (task for task in read_positions(input_path) if task[0] not in done)
+    count = 0
+    with open(output_path, "a" if resume else "w") as output:
+        for row in analyse_stream(positions, depth, movetime, workers, in_flight, ordered, hash_mb):
+            output.write(json.dumps(row) + "\n")
+            output.flush()
+            count += 1
+            if on_result is not None:
+                on_result(row)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch analysis of EPD/FEN/PGN files")
+    parser.add_argument("input", help="file .epd/.fen (mỗi dòng một thế cờ) hoặc .pgn")
+    parser.add_argument("-o", "--output", required=True, help="file kết quả JSONL")
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--movetime", type=float, default=None, help="giây mỗi thế cờ")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--in-flight", type=int, default=None, help="số thế cờ tối đa đang chờ (mặc định 2 x workers)")
+    parser.add_argument("--hash", type=int, default=minmax.HASH_MB, help="bảng chuyển vị mỗi tiến trình (MB)")
+    parser.add_argument("--unordered", action="store_true", help="ghi kết quả theo thứ tự xong trước")
+    parser.add_argument("--resume", action="store_true", help="bỏ qua các thế cờ đã có trong file kết quả")
+    args = parser.parse_args()
+
+    def progress(row):
+        print(f"{row['id']}: {row['bestmove']} {row['score']} depth {row['depth']}", file=sys.stderr)
+
+    count = analyse_file(args.input, args.output, args.depth, args.movetime, args.workers, args.in_flight,
+                         not args.unordered, args.resume, args.hash, on_result=progress)
+    print(f"Analysed {count} positions", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+    Benchmark tìm kiếm cố định độ sâu trên một bộ thế cờ cố định.
+    Số nút (signature) chỉ thay đổi khi thuật toán tìm kiếm thay đổi, còn NPS đo tốc độ.
+
+        python bench.py                        # độ sâu mặc định
+        python bench.py --depth 5 --save bench_baseline.json
+        python bench.py --compare bench_baseline.json
+        python bench.py --option null_move=false  # tắt một tuỳ chọn của Engine
+        python bench.py --ablate                  # số nút khi tắt từng kỹ thuật cắt tỉa
+"""
+import argparse
+import json
+import sys
+import time
+import zlib
+
+import chess
+
+import minmax
+from timeman import TimeManager
+
+# Các thế cờ trong test.py
+TEST_FENS = [
+    "6k1/5ppp/8/8/8/8/5PPP/6K1 w - - 0 1",
+    "6k1/5ppp/8/8/8/8/5PPP/6K1 b - - 0 1",
+    "rnb1kbnr/pppppppp/8/8/8/8/PPPPPPPP/RNB1KBNR w KQkq - 0 1",
+    "rnb1kbnr/pppppppp/8/8/8/8/PPPPPPPP/RNB1KBNR b KQkq - 0 1",
+    "4k3/8/8/8/2q1N3/8/8/4K3 w - - 0 1",
+    "8/8/4q3/8/3N4/8/4K3/8 w - - 0 1",
+    "8/8/8/8/2r5/8/2Q5/4K3 w - - 0 1",
+    "8/8/8/8/8/4k3/5P2/4K3 w - - 0 1",
+    "8/8/4q3/8/3R4/8/4K3/8 w - - 0 1",
+    "8/8/8/8/3B4/8/4k3/4K3 w - - 0 1",
+    "8/8/8/8/4k3/8/4Q3/4K3 w - - 0 1",
+]
+
+# Trung cuộc và tàn cuộc chuẩn
+STANDARD_FENS = [
+    chess.STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "r3r1k1/2p2ppp/p1p1bn2/8/1q2P3/2NPQN2/PPP3PP/R4RK1 b - - 2 15",
+    "r1bbk1nr/pp3p1p/2n5/1N4p1/2Np1B2/8/PPP2PPP/2KR1B1R w kq - 0 13",
+    "4rrk1/pp1n3p/3q2pQ/2p1pb2/2PP4/2P3N1/P2B2PP/4RRK1 b - - 7 19",
+    "3r1rk1/pp1q1ppp/2pbbn2/8/3P4/2NBBQ2/PPP2PPP/3R1RK1 w - - 6 14",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "8/8/8/8/5kp1/P7/8/1K1N4 w - - 0 1",
+    "6k1/6p1/6Pp/ppp5/3pn2P/1P3K2/1PP2P2/8 b - - 0 1",
+    "8/3p4/p1bk3p/Pp6/1Kp1PpPp/2P2P1P/2P5/5B2 b - - 0 1",
+    "5k2/7R/4P2p/5K2/p1r2P1p/8/8/8 b - - 0 1",
+]
+
+BENCH_FENS = TEST_FENS + STANDARD_FENS
+DEFAULT_DEPTH = 4
+
+# Các tuỳ chọn cắt tỉa được --ablate tắt lần lượt
+PRUNING_OPTIONS = ['lmr', 'null_move', 'reverse_futility', 'futility', 'razoring']
+
+
+def run_bench(depth=DEFAULT_DEPTH, fens=BENCH_FENS, verbose=False, options=None):
+    """
+        Tìm kiếm từng thế cờ tới đúng độ sâu depth, không giới hạn thời gian, với trạng thái
+        engine sạch cho mỗi thế cờ để kết quả tất định. options: tuỳ chọn của Engine.
+        Trả về dict kết quả.
+    """
+    engine = minmax.Engine(**(options or {}))
+    positions = []
+    total_nodes = 0
+    total_time = 0.0
+    for fen in fens:
+        engine.new_game()
+        board = chess.Board(fen)
+        start = time.perf_counter()
+        result = engine.search(board, depth, manager=TimeManager())
+        elapsed = time.perf_counter() - start
+        total_nodes += result.nodes
+        total_time += elapsed
+        move = result.move.uci() if result.move else "0000"
+        positions.append({'fen': fen, 'move': move, 'score': result.score, 'nodes': result.nodes})
+        if verbose:
+            print(f"{fen:<75} {move:<6} {result.nodes:>9} {elapsed:>7.2f}s")
+
+    signature = zlib.crc32("\n".join(f"{p['fen']} {p['move']} {p['nodes']}" for p in positions).encode())
+    return {
+        'depth': depth,
+        'nodes': total_nodes,
+        'signature': f"{signature:08x}",
+        'time': total_time,
+        'nps': int(total_nodes / total_time) if total_time > 0 else 0,
+        'positions': positions,
+    }
+
+
+def compare(result, baseline):
+    """In so sánh với baseline; trả về False nếu số nút hoặc nước đi đã thay đổi."""
+    same = result['depth'] == baseline['depth'] and result['signature'] == baseline['signature']
+    node_change = (result['nodes'] - baseline['nodes']) / baseline['nodes'] * 100
+    nps_change = (result['nps'] - baseline['nps']) / baseline['nps'] * 100 if baseline['nps'] else 0.0
+    print(f"Baseline signature  : {baseline['signature']} ({'same' if same else 'CHANGED'})")
+    print(f"Nodes vs baseline   : {node_change:+.1f}%")
+    print(f"NPS vs baseline     : {nps_change:+.1f}%")
+    if not same:
+        old_positions = {p['fen']: p for p in baseline['positions']}
+        for position in result['positions']:
+            old = old_positions.get(position['fen'])
+            if old and (old['move'], old['nodes']) != (position['move'], position['nodes']):
+                print(f"  {position['fen']}: {old['move']} {old['nodes']} -> {position['move']} {position['nodes']}")
+    return same
+
+
+def parse_option(text):
+    """'name=value' -> (name, value); value là bool, int hoặc giữ nguyên chuỗi."""
+    name, _, value = text.partition("=")
+    if value.lower() in ("true", "false"):
+        return name, value.lower() == "true"
+    try:
+        return name, int(value)
+    except ValueError:
+        return name, value
+
+
+def ablate(depth=DEFAULT_DEPTH, options=None):
+    """In số nút và điểm của từng thế cờ khi tắt lần lượt mỗi kỹ thuật trong PRUNING_OPTIONS."""
+    options = dict(options or {})
+    full = run_bench(depth, options=options)
+    print(f"{'all enabled':<20}: {full['nodes']:>9} nodes")
+    for name in PRUNING_OPTIONS:
+        result = run_bench(depth, options=dict(options, **{name: False}))
+        saving = (result['nodes'] - full['nodes']) / result['nodes'] * 100 if result['nodes'] else 0.0
+        changed = sum(a['move'] != b['move'] for a, b in zip(full['positions'], result['positions']))
+        print(f"{'no ' + name:<20}: {result['nodes']:>9} nodes ({name} saves {saving:.1f}%, "
+              f"{changed} best moves differ)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic fixed-depth search benchmark")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH)
+    parser.add_argument("--save", metavar="FILE", help="ghi kết quả làm baseline (JSON)")
+    parser.add_argument("--compare", metavar="FILE", help="so sánh với baseline đã lưu")
+    parser.add_argument("-v", "--verbose", action="store_true", help="in kết quả từng thế cờ")
+    parser.add_argument("--option", action="append", default=[], metavar="NAME=VALUE",
+                        help="tuỳ chọn của Engine, ví dụ null_move=false (có thể lặp lại)")
+    parser.add_argument("--ablate", action="store_true", help="so sánh số nút khi tắt từng kỹ thuật cắt tỉa")
+    args = parser.parse_args()
+    options = dict(parse_option(text) for text in args.option)
+
+    if args.ablate:
+        ablate(args.depth, options)
+        return
+
+    result = run_bench(args.depth, verbose=args.verbose, options=options)
+    print(f"Depth               : {result['depth']}")
+    print(f"Total time (s)      : {result['time']:.2f}")
+    print(f"Nodes searched      : {result['nodes']}")
+    print(f"Signature           : {result['signature']}")
+    print(f"Nodes/second        : {result['nps']}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(result, baseline):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+    Sách khai cuộc định dạng Polyglot (.bin).
+    File được ánh xạ bộ nhớ (mmap) và tìm nhị phân theo khoá Zobrist Polyglot,
+    không đọc toàn bộ vào RAM.
+"""
+import mmap
+import os
+import random
+import struct
+
+import chess
+import chess.polyglot
+
+ENTRY = struct.Struct(">QHHI")  # key, move, weight, learn: 16 byte big-endian, sắp xếp theo key
+PROMOTION_PIECES = [None, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN]
+
+
+def decode_book_move(board, raw):
+    """Đổi nước đi Polyglot sang chess.Move; nhập thành được ghi là vua ăn xe (e1h1 -> e1g1)."""
+    to_square = raw & 0x3F
+    from_square = (raw >> 6) & 0x3F
+    promotion = PROMOTION_PIECES[(raw >> 12) & 0x7]
+    if board.piece_type_at(from_square) == chess.KING and board.color_at(to_square) == board.turn \
+            and board.piece_type_at(to_square) == chess.ROOK:
+        file = 6 if chess.square_file(to_square) > chess.square_file(from_square) else 2
+        to_square = chess.square(file, chess.square_rank(from_square))
+    return chess.Move(from_square, to_square, promotion)
+
+
+class PolyglotBook:
+    """
+        randomness: 0 luôn chọn nước có trọng số lớn nhất, 1 chọn theo tỉ lệ trọng số,
+        lớn hơn 1 làm phân bố đều hơn (trọng số được lấy mũ 1/randomness).
+    """
+
+    def __init__(self, path, randomness=1.0, rng=None):
+        self.path = path
+        self.randomness = randomness
+        self.rng = rng or random.Random()
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.size = size - size % ENTRY.size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+    def __len__(self):
+        return self.size // ENTRY.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b""
+        self.size = 0
+        self.file.close()
+
+    def _entries(self, key):
+        # Tìm nhị phân ô đầu tiên có khoá >= key, rồi đọc tiếp các ô cùng khoá
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if ENTRY.unpack_from(self.data, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        while low < len(self):
+            entry_key, raw_move, weight, _ = ENTRY.unpack_from(self.data, low * ENTRY.size)
+            if entry_key != key:
+                break
+            yield raw_move, weight
+            low += 1
+
+    def moves(self, board):
+        """Danh sách (move, weight) hợp lệ của thế cờ trong sách."""
+        result = []
+        for raw_move, weight in self._entries(chess.polyglot.zobrist_hash(board)):
+            move = decode_book_move(board, raw_move)
+            if board.is_legal(move):
+                result.append((move, weight))
+        return result
+
+    def choose(self, board):
+        """Chọn một nước đi trong sách, hoặc None nếu thế cờ không có trong sách."""
+        entries = self.moves(board)
+        if not entries:
+            return None
+        if self.randomness <= 0:
+            return max(entries, key=lambda entry: entry[1])[0]
+        weights = [max(weight, 1) ** (1.0 / self.randomness) for _, weight in entries]
+        return self.rng.choices([move for move, _ in entries], weights)[0]
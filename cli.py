@@ -0,0 +1,77 @@
+"""
+    Chạy bot không cần giao diện (không import pygame).
+
+        python cli.py analyse "<fen>" --depth 6
+        python cli.py selfplay --games 2 --depth 3 --pgn selfplay.pgn
+"""
+import argparse
+import sys
+
+import chess
+import chess.pgn
+
+import minmax
+
+
+def analyse(fen, depth=6, movetime=None, output=sys.stdout):
+    """In một dòng cho mỗi vòng lặp iterative deepening và trả về SearchResult cuối."""
+    board = chess.Board(fen)
+
+    def info(result):
+        pv = " ".join(move.uci() for move in result.pv)
+        output.write(f"depth {result.depth} score {minmax.format_score(result.score)} nodes {result.nodes} pv {pv}\n")
+
+    result = minmax.search(board, depth, movetime=movetime, on_iteration=info)
+    output.write(f"bestmove {result.move.uci() if result.move else '0000'}\n")
+    return result
+
+
+def selfplay(games=1, depth=4, movetime=None, fen=chess.STARTING_FEN, max_plies=200, output=sys.stdout):
+    """Bot tự đấu với chính nó; trả về danh sách chess.pgn.Game."""
+    results = []
+    for game_index in range(games):
+        minmax.new_game()
+        board = chess.Board(fen)
+        while not board.is_game_over(claim_draw=True) and len(board.move_stack) < max_plies:
+            board.push(minmax.get_best_move(board, depth, movetime=movetime))
+        game = chess.pgn.Game.from_board(board)
+        game.headers["Event"] = "ChessBot selfplay"
+        game.headers["Round"] = str(game_index + 1)
+        game.headers["White"] = game.headers["Black"] = "ChessBot"
+        outcome = board.outcome(claim_draw=True)
+        game.headers["Result"] = outcome.result() if outcome is not None else "1/2-1/2"
+        output.write(f"game {game_index + 1}: {game.headers['Result']} in {len(board.move_stack)} plies\n")
+        results.append(game)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless ChessBot runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyse_parser = commands.add_parser("analyse", help="phân tích một thế cờ")
+    analyse_parser.add_argument("fen", nargs="?", default=chess.STARTING_FEN)
+    analyse_parser.add_argument("--depth", type=int, default=6)
+    analyse_parser.add_argument("--movetime", type=float, default=None)
+
+    selfplay_parser = commands.add_parser("selfplay", help="bot tự đấu với chính nó")
+    selfplay_parser.add_argument("--games", type=int, default=1)
+    selfplay_parser.add_argument("--depth", type=int, default=4)
+    selfplay_parser.add_argument("--movetime", type=float, default=None)
+    selfplay_parser.add_argument("--fen", default=chess.STARTING_FEN)
+    selfplay_parser.add_argument("--max-plies", type=int, default=200)
+    selfplay_parser.add_argument("--pgn", default=None, help="file PGN ghi các ván")
+
+    args = parser.parse_args(argv)
+    if args.command == "analyse":
+        analyse(args.fen, args.depth, args.movetime)
+    else:
+        games = selfplay(args.games, args.depth, args.movetime, args.fen, args.max_plies)
+        if args.pgn:
+            with open(args.pgn, "w") as f:
+                for game in games:
+                    f.write(str(game) + "\n\n")
+
+
+if __name__ == "__main__":
+    main()
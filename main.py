@@ -1,24 +1,39 @@
-import pygame
+import os
+
 import chess
 import chess.engine
+import pygame
 
-from minmax import *
-
-pygame.init()
+from minmax import format_score
+from worker import SearchWorker
 
 WIDTH, HEIGHT = 600, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Chess Game")
-STOCKFISH_PATH = "D:/AI/BTL/stockfish-windows-x86-64-avx2/stockfish/stockfish-windows-x86-64-avx2.exe"  # Đổi đường dẫn tới Stockfish
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+STOCKFISH_PATH = os.environ.get("STOCKFISH_PATH", "stockfish")  # Đường dẫn tới Stockfish
 
-piece_images = {}
-for piece in chess.PIECE_SYMBOLS[1:]:
-    piece_images[piece] = pygame.image.load(f'assets/{piece}_black.png')
-    piece_images[piece.upper()] = pygame.image.load(f'assets/{piece}_white.png')
+screen = None
+images = {}  # Ký hiệu quân ('P', 'n', ...) hoặc loại highlight ('move', 'kill', 'check') -> ảnh gốc
+
+
+def init_display():
+    """Khởi tạo pygame, mở cửa sổ và nạp ảnh; chỉ gọi khi thực sự chạy giao diện."""
+    global screen
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Chess Game")
+    if not images:
+        for piece in chess.PIECE_SYMBOLS[1:]:
+            images[piece] = pygame.image.load(os.path.join(ASSETS_DIR, f"{piece}_black.png"))
+            images[piece.upper()] = pygame.image.load(os.path.join(ASSETS_DIR, f"{piece}_white.png"))
+        images["move"] = pygame.image.load(os.path.join(ASSETS_DIR, "square_of_highlight.png"))
+        images["kill"] = pygame.image.load(os.path.join(ASSETS_DIR, "square_of_kill.png"))
+        images["check"] = pygame.image.load(os.path.join(ASSETS_DIR, "square_of_in_check.png"))
+    # Surface đã convert phụ thuộc vào cửa sổ hiện tại
+    _scaled_images.clear()
+    _backgrounds.clear()
+    invalidate_board()
+    return screen
 
-highlight_image = pygame.image.load("assets/square_of_highlight.png")
-kill_highlight_image = pygame.image.load("assets/square_of_kill.png")
-check_highlight_image = pygame.image.load("assets/square_of_in_check.png")  
 
 HUMAN_VS_HUMAN = 1
 HUMAN_VS_BOT = 2
@@ -28,38 +43,78 @@ mode = HUMAN_VS_HUMAN
 # Load engine cho bot
 # engine = chess.engine.SimpleEngine.popen_uci("stockfish")
 
+FPS = 30
+IDLE_TIMEOUT = 100  # ms chờ sự kiện khi bot đang tìm kiếm, để cập nhật trạng thái tìm kiếm
+
+_scaled_images = {}  # (tên ảnh, cỡ ô) -> surface đã scale, chỉ scale một lần
+_backgrounds = {}  # cỡ ô -> bàn cờ trống vẽ sẵn
+_drawn_squares = {}  # ô -> trạng thái đã vẽ trên màn hình, để chỉ vẽ lại ô thay đổi
+
+
+def scaled_image(name, square_size):
+    key = (name, square_size)
+    if key not in _scaled_images:
+        _scaled_images[key] = pygame.transform.smoothscale(images[name], (square_size, square_size)).convert_alpha()
+    return _scaled_images[key]
+
+
+def board_background(square_size):
+    if square_size not in _backgrounds:
+        colors = [pygame.Color("white"), pygame.Color("gray")]
+        background = pygame.Surface((square_size * 8, square_size * 8)).convert()
+        for row in range(8):
+            for col in range(8):
+                background.fill(colors[(row + col) % 2],
+                                pygame.Rect(col * square_size, row * square_size, square_size, square_size))
+        _backgrounds[square_size] = background
+    return _backgrounds[square_size]
+
+
+def invalidate_board():
+    """Buộc vẽ lại toàn bộ bàn cờ ở lần draw_board tiếp theo (ví dụ sau khi màn hình menu đè lên)."""
+    _drawn_squares.clear()
+
+
 def draw_board(board, highlighted_squares={}, last_move=None):
-    colors = [pygame.Color("white"), pygame.Color("gray")]
+    """Chỉ vẽ lại và cập nhật những ô có thay đổi so với lần vẽ trước."""
     square_size = WIDTH // 8
+    if _drawn_squares.get("size") != square_size:
+        _drawn_squares.clear()
+        _drawn_squares["size"] = square_size
+    background = board_background(square_size)
+    dirty = []
 
     for row in range(8):
         for col in range(8):
-            color = colors[(row + col) % 2]
-            pygame.draw.rect(screen, color, pygame.Rect(col * square_size, row * square_size, square_size, square_size))
-
             square = chess.square(col, 7 - row)
-            
-            # Highlight the last moved squares
-            if last_move and (square == last_move.from_square or square == last_move.to_square):
-                pygame.draw.rect(screen, pygame.Color("yellow"), pygame.Rect(col * square_size, row * square_size, square_size, square_size))
-
-            if square in highlighted_squares:
-                highlight_type = highlighted_squares[square]
-                img = highlight_image
-                if highlight_type == "kill":
-                    img = kill_highlight_image
-                elif highlight_type == "check":
-                    img = check_highlight_image
-
-                screen.blit(pygame.transform.scale(img, (square_size, square_size)),
-                            (col * square_size, row * square_size))
-
             piece = board.piece_at(square)
-            if piece:
-                img = piece_images[piece.symbol()]
-                screen.blit(pygame.transform.scale(img, (square_size, square_size)),
-                            (col * square_size, row * square_size))
-    pygame.display.flip()
+            # Highlight the last moved squares
+            is_last_move = bool(last_move and (square == last_move.from_square or square == last_move.to_square))
+            state = (piece.symbol() if piece else None, highlighted_squares.get(square), is_last_move)
+            if _drawn_squares.get(square) == state:
+                continue
+            _drawn_squares[square] = state
+
+            rect = pygame.Rect(col * square_size, row * square_size, square_size, square_size)
+            screen.blit(background, rect, rect)
+            if is_last_move:
+                screen.fill(pygame.Color("yellow"), rect)
+            if state[1] is not None:
+                screen.blit(scaled_image(state[1], square_size), rect)
+            if state[0] is not None:
+                screen.blit(scaled_image(state[0], square_size), rect)
+            dirty.append(rect)
+
+    if dirty:
+        pygame.display.update(dirty)
+
+
+def wait_events(timeout=None):
+    """Chờ sự kiện thay vì quay vòng; timeout (ms) để vẫn thức dậy định kỳ khi cần."""
+    event = pygame.event.wait(timeout) if timeout else pygame.event.wait()
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
 
 
 def play_human_vs_human():
@@ -68,6 +123,7 @@ def play_human_vs_human():
     selected_square = None
     highlighted_squares = {}
     last_move = None
+    clock = pygame.time.Clock()
 
     while running:
         if board.is_check():
@@ -75,7 +131,9 @@ def play_human_vs_human():
             highlighted_squares[king_square] = "check"
 
         draw_board(board, highlighted_squares, last_move)
-        for event in pygame.event.get():
+        clock.tick(FPS)
+        # Không có gì thay đổi nếu không có sự kiện: ngủ tới sự kiện tiếp theo
+        for event in wait_events():
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -104,12 +162,35 @@ def play_human_vs_human():
     pygame.quit()
 
 
+def set_caption(caption):
+    if pygame.display.get_caption()[0] != caption:
+        pygame.display.set_caption(caption)
+
+
+def show_thinking(worker):
+    """Hiển thị trạng thái tìm kiếm (độ sâu, điểm, biến chính) trên thanh tiêu đề."""
+    info = worker.info
+    if worker.pondering:
+        status = "Pondering"
+    elif worker.busy:
+        status = "Thinking"
+    else:
+        set_caption("Chess Game")
+        return
+    if info is not None:
+        pv = " ".join(move.uci() for move in info.pv[:6])
+        status += f"... depth {info.depth}  score {format_score(info.score)}  pv {pv}"
+    set_caption(f"Chess Game - {status}")
+
+
 def play_human_vs_bot(bot_color=chess.WHITE):
     board = chess.Board()
     running = True
     selected_square = None
     highlighted_squares = {}
     last_move = None
+    worker = SearchWorker(max_depth=5)
+    clock = pygame.time.Clock()
 
     while running:
         if board.is_check():
@@ -117,41 +198,55 @@ def play_human_vs_bot(bot_color=chess.WHITE):
             highlighted_squares[king_square] = "check"
 
         draw_board(board, highlighted_squares, last_move)
+        show_thinking(worker)
 
         if board.turn == bot_color and not board.is_game_over():
-            bot_move = get_best_move(board, 5)
-            board.push(bot_move)
-            last_move = bot_move  # Update the last move for the bot
-        else:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.MOUSEBUTTONDOWN and board.turn != bot_color:
-                    x, y = pygame.mouse.get_pos()
-                    col, row = x // (WIDTH // 8), 7 - (y // (HEIGHT // 8))
-                    square = chess.square(col, row)
-
-                    if selected_square is None:
-                        selected_square = square
-                        highlighted_squares = {}
-                        for move in board.legal_moves:
-                            if move.from_square == selected_square:
-                                if board.piece_at(move.to_square):
-                                    highlighted_squares[move.to_square] = "kill"
-                                else:
-                                    highlighted_squares[move.to_square] = "move"
-                    else:
-                        move = chess.Move(selected_square, square)
-                        if move in board.legal_moves:
-                            board.push(move)
-                            last_move = move  # Update the last move for the human
-                        selected_square = None
-                        highlighted_squares = {}
+            if not worker.busy and not worker.pondering and worker.result is None:
+                worker.start(board)
+            result = worker.take_result()
+            if result is not None:
+                board.push(result.move)
+                last_move = result.move  # Update the last move for the bot
+                # Ponder nước đáp dự đoán trong lúc người chơi suy nghĩ
+                if len(result.pv) > 1 and not board.is_game_over():
+                    worker.ponder(board, result.pv[1])
+
+        # Luôn xử lý sự kiện, kể cả khi bot đang tìm kiếm, để cửa sổ không bị treo;
+        # chỉ thức dậy định kỳ khi còn chờ kết quả hoặc đang ponder
+        timeout = IDLE_TIMEOUT if worker.busy or board.turn == bot_color else None
+        for event in wait_events(timeout):
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.MOUSEBUTTONDOWN and board.turn != bot_color:
+                x, y = pygame.mouse.get_pos()
+                col, row = x // (WIDTH // 8), 7 - (y // (HEIGHT // 8))
+                square = chess.square(col, row)
+
+                if selected_square is None:
+                    selected_square = square
+                    highlighted_squares = {}
+                    for move in board.legal_moves:
+                        if move.from_square == selected_square:
+                            if board.piece_at(move.to_square):
+                                highlighted_squares[move.to_square] = "kill"
+                            else:
+                                highlighted_squares[move.to_square] = "move"
+                else:
+                    move = chess.Move(selected_square, square)
+                    if move in board.legal_moves:
+                        board.push(move)
+                        last_move = move  # Update the last move for the human
+                        if not board.is_game_over():
+                            worker.opponent_moved(board, move)
+                    selected_square = None
+                    highlighted_squares = {}
 
         if board.is_game_over():
             print("Game Over!", board.result())
             running = False
+        clock.tick(FPS)
 
+    worker.cancel()
     pygame.quit()
 
 
@@ -161,23 +256,29 @@ def play_bot_vs_bot(delay=1000):
     engine.configure({"Skill Level": 8})
     running = True
     last_move = None # Use the global variable to track the last move
+    worker = SearchWorker(max_depth=6)
+    clock = pygame.time.Clock()
 
     while running:
         draw_board(board, last_move=last_move)
+        show_thinking(worker)
 
         if not board.is_game_over():
+            move = None
             if board.turn == chess.WHITE:
-                bot_move = get_best_move(board, 6)
-                board.push(bot_move)
-                last_move = bot_move  # Update the last move for the white bot
+                if not worker.busy and worker.result is None:
+                    worker.start(board)
+                result = worker.take_result()
+                move = result.move if result is not None else None
             else:
                 result = engine.play(board, chess.engine.Limit(time=0.1))
                 move = result.move
-                board.push(move)
-                last_move = move  # Update the last move for the black bot
 
-            draw_board(board, last_move=last_move)
-            pygame.time.delay(delay)
+            if move is not None:
+                board.push(move)
+                last_move = move  # Update the last move
+                draw_board(board, last_move=last_move)
+                pygame.time.delay(delay)
         else:
             print("Game Over!", board.result())
             running = False
@@ -185,13 +286,15 @@ def play_bot_vs_bot(delay=1000):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+        clock.tick(FPS)
 
+    worker.cancel()
+    engine.quit()
     pygame.quit()
 
 
 def main():
-    pygame.init()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    screen = init_display()
 
     font = pygame.font.SysFont("Arial", 30)
     options = [
@@ -201,16 +304,19 @@ def main():
     ]
     selected = 0
 
+    redraw = True
     while True:
-        screen.fill((255, 255, 255))
-        for i, (text, _) in enumerate(options):
-            color = (0, 0, 255) if i == selected else (0, 0, 0)
-            text_surface = font.render(text, True, color)
-            screen.blit(text_surface, (50, 50 + i * 50))
-
-        pygame.display.flip()
-
-        for event in pygame.event.get():
+        if redraw:
+            screen.fill((255, 255, 255))
+            for i, (text, _) in enumerate(options):
+                color = (0, 0, 255) if i == selected else (0, 0, 0)
+                text_surface = font.render(text, True, color)
+                screen.blit(text_surface, (50, 50 + i * 50))
+            pygame.display.flip()
+
+        events = wait_events()
+        redraw = bool(events)
+        for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit()
                 return
@@ -0,0 +1,230 @@
+"""
+    Chạy trận đấu song song giữa bot và một engine UCI bất kỳ (Stockfish, hoặc chính uci.py
+    ở độ sâu thấp hơn), với bộ khai cuộc cân bằng đổi màu, ghi PGN, SPRT và Elo kèm sai số.
+
+        python match.py --opponent "stockfish" --option "Skill Level=8" --games 100 --concurrency 4
+        python match.py --opponent "python uci.py" --opponent-depth 2 --depth 4 --sprt 0 50
+"""
+import argparse
+import math
+import multiprocessing
+import shlex
+import sys
+from multiprocessing import util
+
+import chess
+import chess.engine
+import chess.pgn
+
+import minmax
+
+# Các khai cuộc cân bằng; mỗi khai cuộc được chơi hai ván, bot cầm trắng rồi cầm đen
+OPENINGS = [
+    "e2e4 e7e5 g1f3 b8c6 f1b5 a7a6",
+    "e2e4 e7e5 g1f3 b8c6 f1c4 f8c5",
+    "e2e4 c7c5 g1f3 d7d6 d2d4 c5d4",
+    "e2e4 c7c5 b1c3 b8c6 g2g3 g7g6",
+    "e2e4 e7e6 d2d4 d7d5 b1c3 g8f6",
+    "e2e4 c7c6 d2d4 d7d5 e4e5 c8f5",
+    "d2d4 d7d5 c2c4 e7e6 b1c3 g8f6",
+    "d2d4 d7d5 c2c4 c7c6 g1f3 g8f6",
+    "d2d4 g8f6 c2c4 g7g6 b1c3 f8g7",
+    "d2d4 g8f6 c2c4 e7e6 g1f3 b7b6",
+    "c2c4 e7e5 b1c3 g8f6 g2g3 d7d5",
+    "g1f3 d7d5 g2g3 g8f6 f1g2 e7e6",
+]
+
+MAX_PLIES = 400  # Quá số nửa nước này thì xử hoà
+
+_opponent = None
+_settings = None
+
+
+def _worker_init(opponent_command, opponent_options, settings):
+    """Mỗi tiến trình giữ một engine đối thủ cho mọi ván nó chơi."""
+    global _opponent, _settings
+    _opponent = chess.engine.SimpleEngine.popen_uci(opponent_command)
+    if opponent_options:
+        _opponent.configure(opponent_options)
+    util.Finalize(_opponent, _opponent.quit, exitpriority=16)
+    _settings = settings
+
+
+def _opponent_limit(settings):
+    if settings.get('opponent_depth'):
+        return chess.engine.Limit(depth=settings['opponent_depth'])
+    return chess.engine.Limit(time=settings.get('opponent_movetime', 0.1))
+
+
+def play_game(game_id, opening, bot_white, settings=None, opponent=None):
+    """Chơi một ván từ khai cuộc opening; trả về (game_id, kết quả theo góc nhìn bot, PGN)."""
+    settings = settings or _settings
+    opponent = opponent or _opponent
+    minmax.new_game()
+    board = chess.Board()
+    for uci_move in opening.split():
+        board.push_uci(uci_move)
+
+    bot_color = chess.WHITE if bot_white else chess.BLACK
+    limit = _opponent_limit(settings)
+    while not board.is_game_over(claim_draw=True) and len(board.move_stack) < settings.get('max_plies', MAX_PLIES):
+        if board.turn == bot_color:
+            move = minmax.get_best_move(board, settings.get('depth', 4), movetime=settings.get('movetime'))
+        else:
+            move = opponent.play(board, limit, game=game_id).move
+        board.push(move)
+
+    outcome = board.outcome(claim_draw=True)
+    result = outcome.result() if outcome is not None else "1/2-1/2"
+    game = chess.pgn.Game.from_board(board)
+    game.headers["Event"] = "ChessBot match"
+    game.headers["Round"] = str(game_id + 1)
+    game.headers["White"] = "ChessBot" if bot_white else "Opponent"
+    game.headers["Black"] = "Opponent" if bot_white else "ChessBot"
+    game.headers["Result"] = result
+    score = {"1-0": 1.0, "0-1": 0.0}.get(result, 0.5)
+    return game_id, score if bot_white else 1.0 - score, str(game)
+
+
+def elo_from_score(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return 400 * math.log10(score / (1 - score))
+
+
+def elo_estimate(wins, draws, losses, z=1.96):
+    """Chênh lệch Elo và nửa khoảng tin cậy (mặc định 95%) từ kết quả thắng/hoà/thua."""
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, float("inf")
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = z * math.sqrt(variance / games)
+    low, high = elo_from_score(score - margin), elo_from_score(score + margin)
+    return elo_from_score(score), (high - low) / 2
+
+
+def sprt(wins, draws, losses, elo0, elo1, alpha=0.05, beta=0.05):
+    """
+        SPRT xấp xỉ chuẩn (GSPRT) giữa H0: elo = elo0 và H1: elo = elo1.
+        Trả về (llr, lower, upper, decision) với decision là 'H0', 'H1' hoặc None.
+    """
+    lower = math.log(beta / (1 - alpha))
+    upper = math.log((1 - beta) / alpha)
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, lower, upper, None
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    if variance == 0:
+        return 0.0, lower, upper, None
+    score0 = 1 / (1 + 10 ** (-elo0 / 400))
+    score1 = 1 / (1 + 10 ** (-elo1 / 400))
+    llr = (score1 - score0) * (2 * score - score0 - score1) * games / (2 * variance)
+    decision = 'H1' if llr >= upper else 'H0' if llr <= lower else None
+    return llr, lower, upper, decision
+
+
+def run_match(opponent_command, games=len(OPENINGS) * 2, concurrency=None, opponent_options=None,
+              depth=4, movetime=None, opponent_depth=None, opponent_movetime=0.1, pgn_path=None,
+              sprt_bounds=None, alpha=0.05, beta=0.05, max_plies=MAX_PLIES, on_game=None):
+    """
+        Chơi games ván trên concurrency tiến trình. opponent_command là lệnh chạy engine UCI
+        (chuỗi hoặc list). sprt_bounds=(elo0, elo1) bật dừng sớm bằng SPRT.
+        on_game(wins, draws, losses) được gọi sau mỗi ván. Trả về dict kết quả.
+    """
+    if isinstance(opponent_command, str):
+        opponent_command = shlex.split(opponent_command)
+    settings = {'depth': depth, 'movetime': movetime, 'opponent_depth': opponent_depth,
+                'opponent_movetime': opponent_movetime, 'max_plies': max_plies}
+    tasks = [(game_id, OPENINGS[(game_id // 2) % len(OPENINGS)], game_id % 2 == 0)
+             for game_id in range(games)]
+
+    wins = draws = losses = 0
+    decision = None
+    pgn = open(pgn_path, "w") if pgn_path else None
+    context = multiprocessing.get_context("spawn")
+    pool = context.Pool(concurrency or multiprocessing.cpu_count(), initializer=_worker_init,
+                        initargs=(opponent_command, opponent_options or {}, settings))
+    finished = False
+    try:
+        for game_id, score, game_pgn in pool.imap_unordered(_play_task, tasks):
+            if score == 1.0:
+                wins += 1
+            elif score == 0.0:
+                losses += 1
+            else:
+                draws += 1
+            if pgn is not None:
+                pgn.write(game_pgn + "\n\n")
+                pgn.flush()
+            if on_game is not None:
+                on_game(wins, draws, losses)
+            if sprt_bounds is not None:
+                decision = sprt(wins, draws, losses, *sprt_bounds, alpha=alpha, beta=beta)[3]
+                if decision is not None:
+                    break
+        else:
+            finished = True
+    finally:
+        # Kết thúc bình thường thì để các tiến trình tự đóng engine đối thủ; dừng sớm thì huỷ luôn
+        if finished:
+            pool.close()
+        else:
+            pool.terminate()
+        pool.join()
+        if pgn is not None:
+            pgn.close()
+
+    elo, margin = elo_estimate(wins, draws, losses)
+    return {'wins': wins, 'draws': draws, 'losses': losses, 'elo': elo, 'margin': margin, 'sprt': decision}
+
+
+def _play_task(task):
+    return play_game(*task)
+
+
+def parse_options(pairs):
+    options = {}
+    for pair in pairs or []:
+        name, _, value = pair.partition("=")
+        options[name.strip()] = int(value) if value.strip().lstrip("-").isdigit() else value.strip()
+    return options
+
+
+def format_result(result):
+    line = (f"W/D/L {result['wins']}/{result['draws']}/{result['losses']}  "
+            f"Elo {result['elo']:+.1f} +/- {result['margin']:.1f}")
+    if result['sprt']:
+        line += f"  SPRT: accepted {result['sprt']}"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel match runner against a UCI engine")
+    parser.add_argument("--opponent", required=True, help='lệnh chạy engine UCI, ví dụ "stockfish"')
+    parser.add_argument("--option", action="append", help='tuỳ chọn UCI của đối thủ, ví dụ "Skill Level=8"')
+    parser.add_argument("--games", type=int, default=len(OPENINGS) * 2)
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--depth", type=int, default=4, help="độ sâu tối đa của bot")
+    parser.add_argument("--movetime", type=float, default=None, help="giây mỗi nước của bot")
+    parser.add_argument("--opponent-depth", type=int, default=None)
+    parser.add_argument("--opponent-movetime", type=float, default=0.1)
+    parser.add_argument("--pgn", default=None, help="file PGN ghi các ván đấu")
+    parser.add_argument("--sprt", type=float, nargs=2, metavar=("ELO0", "ELO1"), default=None)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    args = parser.parse_args()
+
+    def progress(wins, draws, losses):
+        elo, margin = elo_estimate(wins, draws, losses)
+        print(f"{wins + draws + losses:>4} games  W/D/L {wins}/{draws}/{losses}  Elo {elo:+.1f} +/- {margin:.1f}",
+              file=sys.stderr)
+
+    result = run_match(args.opponent, args.games, args.concurrency, parse_options(args.option), args.depth,
+                       args.movetime, args.opponent_depth, args.opponent_movetime, args.pgn, args.sprt,
+                       args.alpha, args.beta, on_game=progress)
+    print(format_result(result))
+
+
+if __name__ == "__main__":
+    main()
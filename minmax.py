@@ -1,23 +1,33 @@
-import heapq
+import json
+import logging
+import math
+import os
+from collections import namedtuple
 
 import chess
-import random
-import time
-
-zobrist_table = {}
-for piece in ['P', 'N', 'B', 'R', 'Q', 'K', 'p', 'n', 'b', 'r', 'q', 'k']:
-    for square in chess.SQUARES:
-        zobrist_table[(piece, square)] = random.getrandbits(64)
-
-zobrist_table['white_turn'] = random.getrandbits(64)
-
-zobrist_table['castling_wk'] = random.getrandbits(64)
-zobrist_table['castling_wq'] = random.getrandbits(64)
-zobrist_table['castling_bk'] = random.getrandbits(64)
-zobrist_table['castling_bq'] = random.getrandbits(64)
-
-# key: zobrist_hash, value = (value, depth, flag, best_move)
-transposition_tables = {}
+from chess.polyglot import POLYGLOT_RANDOM_ARRAY
+
+from position import Position
+from tablebase import TB_WIN, wdl_to_score
+from timeman import SearchAborted, TimeManager
+from transposition import (BOUND_EXACT, BOUND_LOWER, BOUND_UPPER, TranspositionTable, decode_move,
+                           encode_move)
+
+# Khoá Zobrist lấy từ bảng ngẫu nhiên của Polyglot để khớp với chess.polyglot.zobrist_hash
+# zobrist_pieces[color][piece_type][square]
+zobrist_pieces = [[None] * 7, [None] * 7]
+for _color in chess.COLORS:
+    for _piece_type in chess.PIECE_TYPES:
+        _offset = 64 * ((_piece_type - 1) * 2 + _color)
+        zobrist_pieces[_color][_piece_type] = POLYGLOT_RANDOM_ARRAY[_offset:_offset + 64]
+zobrist_castling = {chess.BB_H1: POLYGLOT_RANDOM_ARRAY[768], chess.BB_A1: POLYGLOT_RANDOM_ARRAY[769],
+                    chess.BB_H8: POLYGLOT_RANDOM_ARRAY[770], chess.BB_A8: POLYGLOT_RANDOM_ARRAY[771]}
+zobrist_ep_file = POLYGLOT_RANDOM_ARRAY[772:780]
+zobrist_white_turn = POLYGLOT_RANDOM_ARRAY[780]
+
+logger = logging.getLogger(__name__)
+
+HASH_MB = 16  # Kích thước mặc định của bảng chuyển vị (MB)
 
 pawn_scores = [[0, 0, 0, 0, 0, 0, 0, 0, ],
                [78, 83, 86, 73, 102, 82, 85, 90],
@@ -26,7 +36,7 @@ pawn_scores = [[0, 0, 0, 0, 0, 0, 0, 0, ],
                [-26, 3, 10, 9, 6, 1, 0, -23],
                [-22, 9, 5, -11, -10, -2, 3, -19],
                [-31, 8, -7, -37, -36, -14, 3, -31],
-               [0.0, 0.1, 0.2, 0.2, 0.2, 0.2, 0.1, 0.0]]
+               [0, 0, 0, 0, 0, 0, 0, 0]]
 
 bishop_scores = [[-59, -78, -82, -76, -23, -107, -37, -50],
                  [-11, 20, 35, -42, -39, 31, 2, -22],
@@ -65,266 +75,946 @@ knight_scores = [[-66, -53, -75, -75, -10, -55, -58, -70],
                  [-66, -53, -75, -75, -10, -55, -58, -70]]
 
 
-def get_position_scores_table(piece_type, piece_color):
-    piece_position_scores = {2: knight_scores,
-                             3: bishop_scores,
-                             5: queen_scores,
-                             4: rook_scores,
-                             1: pawn_scores}
+piece_score = {6: 6000, 5: 929, 4: 512, 3: 320, 2: 280, 1: 100}
 
-    if piece_color:  # White piece
-        return piece_position_scores[piece_type]
+# Bảng điểm vị trí được trải phẳng thành 64 ô cho từng màu, tính lại mỗi khi đổi tham số.
+# position_tables[color][piece_type][square]; vua không có điểm vị trí.
+position_tables = [[None] * 7, [None] * 7]
+piece_values = [0] * 7
+
+# Tên bảng điểm vị trí trong file tham số (xem texel.py) theo loại quân
+SCORE_TABLES = {chess.PAWN: 'pawn_scores', chess.KNIGHT: 'knight_scores', chess.BISHOP: 'bishop_scores',
+                chess.ROOK: 'rook_scores', chess.QUEEN: 'queen_scores'}
+# File tham số đánh giá đã tune, được nạp khi import nếu tồn tại
+EVAL_PARAMS_FILE = os.environ.get("CHESSBOT_EVAL_PARAMS",
+                                  os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_params.json"))
+
+
+def _build_tables():
+    # Cập nhật tại chỗ để mọi tham chiếu tới position_tables/piece_values vẫn đúng
+    for piece_type, name in SCORE_TABLES.items():
+        scores = globals()[name]
+        position_tables[chess.WHITE][piece_type] = [scores[square // 8][square % 8] for square in chess.SQUARES]
+        position_tables[chess.BLACK][piece_type] = [scores[7 - square // 8][square % 8] for square in chess.SQUARES]
+    position_tables[chess.WHITE][chess.KING] = [0] * 64
+    position_tables[chess.BLACK][chess.KING] = [0] * 64
+    for piece_type in chess.PIECE_TYPES:
+        piece_values[piece_type] = piece_score[piece_type]
+
+
+def eval_params():
+    """Tham số đánh giá hiện tại, cùng định dạng với file JSON do texel.py xuất ra."""
+    params = {name: [list(row) for row in globals()[name]] for name in SCORE_TABLES.values()}
+    params['piece_score'] = {str(piece_type): value for piece_type, value in piece_score.items()}
+    return params
+
+
+def set_eval_params(params):
+    """Thay bảng điểm vị trí và giá trị quân; thiếu khoá nào thì giữ nguyên giá trị cũ."""
+    for name in SCORE_TABLES.values():
+        if name in params:
+            table = [[int(value) for value in row] for row in params[name]]
+            if len(table) != 8 or any(len(row) != 8 for row in table):
+                raise ValueError(f"{name} must be an 8x8 table")
+            globals()[name] = table
+    for piece_type, value in params.get('piece_score', {}).items():
+        piece_score[int(piece_type)] = int(value)
+    _build_tables()
+
+
+def load_eval_params(path=EVAL_PARAMS_FILE):
+    with open(path) as f:
+        set_eval_params(json.load(f))
+
+
+_build_tables()
+if os.path.exists(EVAL_PARAMS_FILE):
+    load_eval_params(EVAL_PARAMS_FILE)
+
+# Bật để kiểm tra điểm cập nhật tăng dần với hàm evaluate_board tính lại toàn bộ
+EVAL_DEBUG = False
+
+
+class EvalState:
+    """Tổng điểm vật chất và điểm vị trí (góc nhìn bên trắng), cập nhật theo từng nước đi."""
+    __slots__ = ('material', 'position', '_stack')
+
+    def __init__(self, board):
+        self.material = 0
+        self.position = 0
+        self._stack = []
+        for color in chess.COLORS:
+            sign = 1 if color else -1
+            tables = position_tables[color]
+            for piece_type in chess.PIECE_TYPES:
+                for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+                    self.material += sign * piece_values[piece_type]
+                    self.position += sign * tables[piece_type][square]
+
+    def push(self, board, move):
+        """Cập nhật điểm cho nước đi move; gọi trước board.push(move)."""
+        self._stack.append((self.material, self.position))
+        color = board.turn
+        tables = position_tables[color]
+        from_square = move.from_square
+        to_square = move.to_square
+        piece_type = board.piece_type_at(from_square)
+        new_type = move.promotion or piece_type
+
+        material = piece_values[new_type] - piece_values[piece_type]
+        position = tables[new_type][to_square] - tables[piece_type][from_square]
+
+        captured = board.piece_type_at(to_square)
+        if captured:
+            material += piece_values[captured]
+            position += position_tables[not color][captured][to_square]
+        elif piece_type == chess.PAWN and to_square == board.ep_square and (from_square - to_square) % 8:
+            capture_square = to_square - 8 if color else to_square + 8
+            material += piece_values[chess.PAWN]
+            position += position_tables[not color][chess.PAWN][capture_square]
+        elif piece_type == chess.KING and abs(to_square - from_square) == 2:
+            # Nhập thành: xe cũng di chuyển
+            if to_square > from_square:
+                rook_from, rook_to = from_square + 3, from_square + 1
+            else:
+                rook_from, rook_to = from_square - 4, from_square - 1
+            position += tables[chess.ROOK][rook_to] - tables[chess.ROOK][rook_from]
+
+        if color:
+            self.material += material
+            self.position += position
+        else:
+            self.material -= material
+            self.position -= position
+
+    def pop(self):
+        self.material, self.position = self._stack.pop()
+
+    def evaluate(self, board):
+        """Điểm của bàn cờ trong O(1); board chỉ dùng khi bật EVAL_DEBUG."""
+        score = self.material + self.position
+        if EVAL_DEBUG:
+            expected = evaluate_board(board)
+            assert score == expected, f"incremental eval {score} != {expected} for {board.fen()}"
+        return score
+
+
+def attackers_mask(board, square, occupied):
+    """Các quân của cả hai bên tấn công square khi chỉ còn các ô trong occupied (tính cả tia X)."""
+    queens_and_rooks = board.queens | board.rooks
+    queens_and_bishops = board.queens | board.bishops
+    attackers = (
+        (chess.BB_KING_ATTACKS[square] & board.kings)
+        | (chess.BB_KNIGHT_ATTACKS[square] & board.knights)
+        | (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] & queens_and_rooks)
+        | (chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied] & queens_and_rooks)
+        | (chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied] & queens_and_bishops)
+        | (chess.BB_PAWN_ATTACKS[chess.BLACK][square] & board.pawns & board.occupied_co[chess.WHITE])
+        | (chess.BB_PAWN_ATTACKS[chess.WHITE][square] & board.pawns & board.occupied_co[chess.BLACK]))
+    return attackers & occupied
+
+
+def see(board, move):
+    """
+        Static Exchange Evaluation: lợi ích vật chất của bên đang đi sau chuỗi ăn quân qua lại
+        trên ô đích, mỗi bên luôn dùng quân rẻ nhất và được quyền dừng khi bất lợi.
+    """
+    from_square = move.from_square
+    to_square = move.to_square
+    color = board.turn
+    occupied = board.occupied ^ chess.BB_SQUARES[from_square]
+
+    victim = board.piece_type_at(to_square)
+    if victim:
+        gain = piece_values[victim]
+    elif board.is_en_passant(move):
+        gain = piece_values[chess.PAWN]
+        occupied ^= chess.BB_SQUARES[to_square - 8 if color else to_square + 8]
     else:
-        return piece_position_scores[piece_type][::-1]
+        gain = 0
+
+    attacker = board.piece_type_at(from_square)
+    if move.promotion:
+        gain += piece_values[move.promotion] - piece_values[chess.PAWN]
+        attacker = move.promotion
+
+    gains = [gain]
+    side = not color
+    while True:
+        attackers = attackers_mask(board, to_square, occupied)
+        side_attackers = attackers & board.occupied_co[side]
+        if not side_attackers:
+            break
+        for piece_type in chess.PIECE_TYPES:
+            candidates = side_attackers & board.pieces_mask(piece_type, side)
+            if candidates:
+                break
+        if piece_type == chess.KING and attackers & board.occupied_co[not side]:
+            break  # Vua không được ăn vào ô đang bị khống chế
+        gains.append(piece_values[attacker] - gains[-1])
+        occupied ^= candidates & -candidates
+        attacker = piece_type
+        side = not side
 
+    while len(gains) > 1:
+        last = gains.pop()
+        gains[-1] = -max(-gains[-1], last)
+    return gains[0]
 
-piece_score = {6: 6000, 5: 929, 4: 512, 3: 320, 2: 280, 1: 100}
-killer_moves = {}  # killer_moves[depth] = [move1, move2]
-history_heuristic = {}  # history_heuristic[(from_square, to_square)] = score
-
-def score_move_cached(move, board, depth, tt_move):
-    if tt_move and move == tt_move:
-        return 10000
-    # Ưu tiên nước ăn quân (MVV-LVA)
-    if board.is_capture(move):
-        victim = board.piece_at(move.to_square)
-        attacker = board.piece_at(move.from_square)
-        victim_val = piece_score.get(victim.piece_type) if victim else 0
-        attacker_val = piece_score.get(attacker.piece_type) if attacker else 1
-        return 5000 + victim_val - attacker_val
-    # Killer move
-    if move in killer_moves.get(depth, []):
-        return 4000
-    # History heuristic
-    return history_heuristic.get((move.from_square, move.to_square), 0)
 
 def evaluate_board(board):
-    """Hàm đánh giá bàn cờ dựa trên giá trị quân cờ"""
+    """Hàm đánh giá bàn cờ dựa trên giá trị quân cờ (tính lại toàn bộ bàn cờ)"""
     score = 0
-    for square in chess.SQUARES:
-        piece = board.piece_at(square)
-        if piece:
-            piece_type = piece.piece_type
-            piece_position_score = 0
-            if piece_type != 6:  # Skip king position scores
-                piece_position_score = get_position_scores_table(piece_type, piece.color)[square // 8][square % 8]
-            if piece.color == True:  # White piece
-                score += piece_score[piece_type] + piece_position_score
-            else:
-                score -= piece_score[piece_type] + piece_position_score
+    for color in chess.COLORS:
+        tables = position_tables[color]
+        color_score = 0
+        for piece_type in chess.PIECE_TYPES:
+            table = tables[piece_type]
+            for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+                color_score += piece_values[piece_type] + table[square]
+        score += color_score if color else -color_score
     return score
 
 
 def zobrist_hash(board: chess.Board):
+    """Tính lại toàn bộ khoá Zobrist của bàn cờ."""
     hash_key = 0
-    for square in chess.SQUARES:
-        piece = board.piece_at(square)
-        if piece:
-            hash_key ^= zobrist_table[(piece.symbol(), square)]
+    for color in chess.COLORS:
+        keys = zobrist_pieces[color]
+        for piece_type in chess.PIECE_TYPES:
+            for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+                hash_key ^= keys[piece_type][square]
+
     if board.turn == chess.WHITE:
-        hash_key ^= zobrist_table['white_turn']
+        hash_key ^= zobrist_white_turn
 
-    if board.castling_rights & chess.BB_H1:
-        hash_key ^= zobrist_table['castling_wk']
-    if board.castling_rights & chess.BB_A1:
-        hash_key ^= zobrist_table['castling_wq']
-    if board.castling_rights & chess.BB_H8:
-        hash_key ^= zobrist_table['castling_bk']
-    if board.castling_rights & chess.BB_A8:
-        hash_key ^= zobrist_table['castling_bq']
+    for square in chess.scan_forward(board.clean_castling_rights()):
+        hash_key ^= zobrist_castling[chess.BB_SQUARES[square]]
+
+    if board.ep_square is not None and _ep_capturable(board, board.ep_square, board.turn):
+        hash_key ^= zobrist_ep_file[board.ep_square % 8]
 
     return hash_key
 
 
+def _ep_capturable(board, ep_square, color):
+    """Chỉ tính ô bắt tốt qua đường khi bên color có tốt đứng cạnh tốt vừa đi hai ô."""
+    pawn_bb = chess.BB_SQUARES[ep_square - 8 if color else ep_square + 8]
+    neighbours = chess.shift_left(pawn_bb) | chess.shift_right(pawn_bb)
+    return bool(neighbours & board.pawns & board.occupied_co[color])
+
+
 def update_hash_key(board: chess.Board, move: chess.Move, old_hash: int):
-    piece = board.piece_at(move.from_square).symbol()
-    hash_key = old_hash
-    hash_key ^= zobrist_table[piece, move.from_square]
-    hash_key ^= zobrist_table[piece, move.to_square]
-
-    hash_key ^= zobrist_table['white_turn']
-
-    old_castling = board.castling_rights
-    board.push(move)  # Thực hiện nước đi để lấy castling mới
-    new_castling = board.castling_rights
-    board.pop()  # Quay lại
-
-    if (old_castling & chess.BB_H1) and not (new_castling & chess.BB_H1):
-        hash_key ^= zobrist_table['castling_wk']
-    if (old_castling & chess.BB_A1) and not (new_castling & chess.BB_A1):
-        hash_key ^= zobrist_table['castling_wq']
-    if (old_castling & chess.BB_H8) and not (new_castling & chess.BB_H8):
-        hash_key ^= zobrist_table['castling_bk']
-    if (old_castling & chess.BB_A8) and not (new_castling & chess.BB_A8):
-        hash_key ^= zobrist_table['castling_bq']
+    """Cập nhật khoá Zobrist cho nước đi move chỉ dựa trên bàn cờ trước khi đi (không push/pop)."""
+    color = board.turn
+    keys = zobrist_pieces[color]
+    from_square = move.from_square
+    to_square = move.to_square
+    piece_type = board.piece_type_at(from_square)
+
+    hash_key = old_hash ^ zobrist_white_turn
+    hash_key ^= keys[piece_type][from_square] ^ keys[move.promotion or piece_type][to_square]
+
+    captured = board.piece_type_at(to_square)
+    if captured:
+        hash_key ^= zobrist_pieces[not color][captured][to_square]
+    elif piece_type == chess.PAWN:
+        diff = to_square - from_square
+        if to_square == board.ep_square and diff % 8:
+            capture_square = to_square - 8 if color else to_square + 8
+            hash_key ^= zobrist_pieces[not color][chess.PAWN][capture_square]
+        elif diff == 16 or diff == -16:
+            ep_square = from_square + diff // 2
+            if _ep_capturable(board, ep_square, not color):
+                hash_key ^= zobrist_ep_file[ep_square % 8]
+    elif piece_type == chess.KING and abs(to_square - from_square) == 2:
+        # Nhập thành: xe cũng di chuyển
+        if to_square > from_square:
+            hash_key ^= keys[chess.ROOK][from_square + 3] ^ keys[chess.ROOK][from_square + 1]
+        else:
+            hash_key ^= keys[chess.ROOK][from_square - 4] ^ keys[chess.ROOK][from_square - 1]
+
+    # Xoá ô bắt tốt qua đường của nước trước
+    if board.ep_square is not None and _ep_capturable(board, board.ep_square, color):
+        hash_key ^= zobrist_ep_file[board.ep_square % 8]
+
+    # Quyền nhập thành mất đi khi vua, xe di chuyển hoặc xe bị bắt
+    castling_rights = board.castling_rights
+    if castling_rights:
+        lost = castling_rights & (chess.BB_SQUARES[from_square] | chess.BB_SQUARES[to_square])
+        if piece_type == chess.KING:
+            lost |= castling_rights & (chess.BB_RANK_1 if color else chess.BB_RANK_8)
+        if lost:
+            for square in chess.scan_forward(lost & board.clean_castling_rights()):
+                hash_key ^= zobrist_castling[chess.BB_SQUARES[square]]
 
     return hash_key
 
 
-def minimax(board, depth, alpha, beta, maximizing_player, hash_key, move):
-    if hash_key is None:
-        hash_key = zobrist_hash(board)
+def update_hash_key_null(board, old_hash: int):
+    """Khoá Zobrist sau một nước bỏ lượt: đổi bên đi và xoá ô bắt tốt qua đường."""
+    hash_key = old_hash ^ zobrist_white_turn
+    if board.ep_square is not None and _ep_capturable(board, board.ep_square, board.turn):
+        hash_key ^= zobrist_ep_file[board.ep_square % 8]
+    return hash_key
 
-    if (hash_key in transposition_tables) and (transposition_tables[hash_key]['depth'] >= depth):
-        entry = transposition_tables[hash_key]
-        if entry['flag'] == 'exact':
-            return entry['value']
-        if entry['flag'] == 'upper' and entry['value'] <= alpha:
-            return entry['value']
-        if entry['flag'] == 'lower' and entry['value'] >= beta:
-            return entry['value']
-
-    if depth == 0 or board.is_game_over():
-        value = evaluate_board(board)
-        transposition_tables[hash_key] = {'value': value, 'depth': 0, 'flag': 'exact'}
-        return value
-
-    legal_moves = list(board.legal_moves)
-    top_k = max(6, 20 - depth * 2)
-
-    if maximizing_player:
-        max_eval = -float("inf")
-        tt_move = None
-        if hash_key in transposition_tables:
-            tt_move = transposition_tables[hash_key].get('best_move')
-
-        scored_moves = [(score_move_cached(move, board, depth, tt_move), move) for move in legal_moves]
-        top_moves = heapq.nlargest(top_k, scored_moves, key=lambda x: x[0])
-        legal_moves = [move for (_, move) in top_moves]
-        # scored_moves = []
-        # for move in legal_moves:
-        #     score = score_move_cached(move, board, depth, tt_move)
-        #     scored_moves.append((score, move))
-        #
-        # # Sắp xếp theo điểm giảm dần
-        # scored_moves.sort(key=lambda x: x[0], reverse=True)
-        #
-        # # Chỉ lấy danh sách move
-        # legal_moves = [move for (_, move) in scored_moves]
-
-        for move in legal_moves:
-            new_hash_key = update_hash_key(board, move, hash_key)
-            board.push(move)
-            eval_score = minimax(board, depth - 1, alpha, beta, False, new_hash_key, move)
-            board.pop()
-            max_eval = max(max_eval, eval_score)
-            alpha = max(alpha, eval_score)
-            if not board.is_capture(move):
-                killer_moves.setdefault(depth, [])
-                if move not in killer_moves[depth]:
-                    killer_moves[depth].insert(0, move)
-                    if len(killer_moves[depth]) > 2:
-                        killer_moves[depth] = killer_moves[depth][:2]
-
-            if beta <= alpha:
-                if not board.is_capture(move):
-                    key = (move.from_square, move.to_square)
-                    history_heuristic[key] = history_heuristic.get(key, 0) + depth * depth
 
-                break
-        if max_eval <= alpha:  # alpha không thay đổi, đây là upper bound
-            flag = 'upper'
-        elif max_eval >= beta:  # beta cắt, đây là lower bound
-            flag = 'lower'
-        else:  # giá trị nằm giữa alpha và beta, exact
-            flag = 'exact'
-        transposition_tables[hash_key] = {'value': max_eval, 'depth': depth, 'flag': flag}
-        return max_eval
+INFINITY = 1000000
 
-    else:
-        min_eval = float("inf")
-        tt_move = None
-        if hash_key in transposition_tables:
-            tt_move = transposition_tables[hash_key].get('best_move')
+CHECK_INTERVAL = 1024  # Kiểm tra hết giờ sau mỗi CHECK_INTERVAL nút (lũy thừa của 2)
+MAX_PLY = 64
+MATE_SCORE = 32000  # Chiếu hết sau ply nước: MATE_SCORE - ply (góc nhìn bên thắng)
+MATE_THRESHOLD = MATE_SCORE - 2 * MAX_PLY  # Điểm tuyệt đối từ đây trở lên là chiếu hết
+DECISIVE_SCORE = TB_WIN - 2 * MAX_PLY  # Chiếu hết hoặc thắng theo bảng tàn cuộc: phụ thuộc ply
 
-        scored_moves = [(score_move_cached(move, board, depth, tt_move), move) for move in legal_moves]
-        top_moves = heapq.nlargest(top_k, scored_moves, key=lambda x: x[0])
-        legal_moves = [move for (_, move) in top_moves]
-        scored_moves = []
-        for move in legal_moves:
-            score = score_move_cached(move, board, depth, tt_move)
-            scored_moves.append((score, move))
+LMR_MIN_DEPTH = 3  # Chỉ giảm độ sâu khi còn ít nhất chừng này
+LMR_MIN_MOVES = 3  # Không giảm độ sâu cho vài nước đầu tiên
+# Mức giảm theo độ sâu còn lại và thứ tự nước đi: 1 + ln(depth) * ln(i) / 2, tính sẵn
+lmr_reductions = [[0] * 64] + [[1 + int(math.log(depth) * math.log(i) / 2) if i else 0 for i in range(64)]
+                               for depth in range(1, MAX_PLY + 1)]
 
-        # Sắp xếp theo điểm giảm dần
-        scored_moves.sort(key=lambda x: x[0], reverse=True)
+DELTA_MARGIN = 200  # Biên an toàn cho delta pruning trong quiescence
 
-        # Chỉ lấy danh sách move
-        legal_moves = [move for (_, move) in scored_moves]
+NULL_MOVE_MIN_DEPTH = 3  # Null move pruning chỉ dùng khi còn ít nhất chừng này
+NULL_MOVE_DEEP = 7  # Từ độ sâu này trở lên giảm R = 3 thay vì 2 (adaptive null move)
+REVERSE_FUTILITY_DEPTH = 3
+REVERSE_FUTILITY_MARGIN = 120  # Nhân với độ sâu còn lại
+FUTILITY_MARGINS = [0, 200, 350]  # Theo độ sâu còn lại (1, 2)
+RAZOR_MARGINS = [0, 300, 550]  # Theo độ sâu còn lại (1, 2)
 
-        for move in legal_moves:
-            new_hash_key = update_hash_key(board, move, hash_key)
-            board.push(move)
-            eval_score = minimax(board, depth - 1, alpha, beta, True, new_hash_key, move)
-            board.pop()
-            min_eval = min(min_eval, eval_score)
-            beta = min(beta, eval_score)
-            if not board.is_capture(move):
-                killer_moves.setdefault(depth, [])
-                if move not in killer_moves[depth]:
-                    killer_moves[depth].insert(0, move)
-                    if len(killer_moves[depth]) > 2:
-                        killer_moves[depth] = killer_moves[depth][:2]
-
-            if beta <= alpha:
-                if not board.is_capture(move):
-                    key = (move.from_square, move.to_square)
-                    history_heuristic[key] = history_heuristic.get(key, 0) + depth * depth
+ASPIRATION_WINDOW_MARGIN = 50
 
-                break
+MAX_TIME = 20  # Giới hạn mặc định (giây) khi không truyền thời gian
 
-        if min_eval <= alpha:  # alpha không thay đổi, đây là upper bound
-            flag = 'upper'
-        elif min_eval >= beta:  # beta cắt, đây là lower bound
-            flag = 'lower'
-        else:  # giá trị nằm giữa alpha và beta, exact
-            flag = 'exact'
-        transposition_tables[hash_key] = {'value': min_eval, 'depth': depth, 'flag': flag}
-        return min_eval
+# Các giai đoạn của bộ chọn nước đi
+STAGE_TT = 0
+STAGE_GOOD_CAPTURE = 1
+STAGE_KILLER = 2
+STAGE_QUIET = 3
+STAGE_BAD_CAPTURE = 4
 
+# Tuỳ chọn của Engine, đổi bằng Engine(**options) hoặc engine.set_option(name, value)
+DEFAULT_OPTIONS = {
+    'lmr': True,  # Late move reductions
+    'null_move': True,  # Null move pruning (tắt khi bên đi chỉ còn vua và tốt)
+    'reverse_futility': True,  # Cắt nút khi điểm tĩnh đã vượt beta một khoảng đủ lớn
+    'futility': True,  # Bỏ nước im lặng gần lá khi điểm tĩnh còn xa dưới alpha
+    'razoring': True,  # Điểm tĩnh rất thấp gần lá: chỉ kiểm tra bằng quiescence
+    'contempt': 0,  # Điểm trừ (centipawn) cho engine khi hoà; âm nếu engine muốn hoà
+}
 
-def minimax_with_aspiration(board, depth, prev_max_eval, margin, maximizing_player):
-    """
-        Thực hiện tìm kiếm minimax với Aspiration Window.
-        Nếu kết quả tìm kiếm nằm ngoài cửa sổ (fail high/low), sẽ thực hiện tìm lại với cửa sổ toàn phần.
-    """
-    alpha = prev_max_eval - margin
-    beta = prev_max_eval + margin
-    eval_score = minimax(board, depth, alpha, beta, maximizing_player, None, None)
-    # Nếu kết quả ngoài phạm vi cửa sổ, thực hiện re-search với cửa sổ toàn phần:
-    if eval_score <= alpha or eval_score >= beta:
-        eval_score = minimax(board, depth, -float("inf"), float("inf"), maximizing_player, None, None)
-    return eval_score
+def score_to_tt(value, ply):
+    """Điểm chiếu hết/thắng chắc lưu vào bảng chuyển vị theo khoảng cách từ nút này, không phải từ gốc."""
+    if value >= DECISIVE_SCORE:
+        return value + ply
+    if value <= -DECISIVE_SCORE:
+        return value - ply
+    return value
 
 
-ASPIRATION_WINDOW_MARGIN = 50
+def score_from_tt(value, ply):
+    if value >= DECISIVE_SCORE:
+        return value - ply
+    if value <= -DECISIVE_SCORE:
+        return value + ply
+    return value
 
-MAX_TIME = 20
 
+def mate_in(score):
+    """Số nước tới khi chiếu hết (âm nếu bên đang đi bị chiếu hết), None nếu score không phải điểm chiếu hết."""
+    if score >= MATE_THRESHOLD:
+        return (MATE_SCORE - score + 1) // 2
+    if score <= -MATE_THRESHOLD:
+        return -((MATE_SCORE + score) // 2)
+    return None
 
-def get_best_move(board, max_depth=6, margin=ASPIRATION_WINDOW_MARGIN):
-    best_move = None
-    start_time = time.time()
-    prev_max_eval = evaluate_board(board)
 
-    for depth in range(1, max_depth + 1):
-        max_eval = -float("inf")
-        current_best_move = None
+def format_score(score):
+    """Điểm theo kiểu UCI: 'cp 35' hoặc 'mate 3' / 'mate -2'."""
+    moves = mate_in(score)
+    return f"cp {score}" if moves is None else f"mate {moves}"
 
-        for move in board.legal_moves:
-            if time.time() - start_time > MAX_TIME:
-                print("Timeout reached! Returning the best move found so far.")
-                break
 
-            board.push(move)
-            eval_score = minimax_with_aspiration(board, depth - 1, prev_max_eval, margin, False)
-            board.pop()
+SearchResult = namedtuple('SearchResult', ['move', 'score', 'depth', 'pv', 'nodes', 'stats'], defaults=[None])
 
-            if eval_score > max_eval:
-                max_eval = eval_score
-                current_best_move = move
-                prev_max_eval = max_eval
 
-        if current_best_move:
-            best_move = current_best_move
+class Engine:
+    """
+        Một engine độc lập: sở hữu bảng chuyển vị, killer move theo ply, bảng history và tuỳ chọn.
+        Nhiều Engine có thể tìm kiếm đồng thời trong cùng một tiến trình (mỗi luồng một Engine).
+        Trạng thái giữa các lần tìm kiếm được xử lý cố định: killer move bị xoá, history bị chia
+        đôi và bảng chuyển vị sang thế hệ mới; new_game() xoá toàn bộ.
+    """
+
+    def __init__(self, hash_mb=HASH_MB, tablebase=None, table=None, **options):
+        self.transposition_table = table if table is not None else TranspositionTable(hash_mb, lazy=True)
+        self.tablebase = tablebase
+        self.options = dict(DEFAULT_OPTIONS)
+        for name, value in options.items():
+            self.set_option(name, value)
+        self.killers = [[None, None] for _ in range(MAX_PLY + 2)]  # killers[ply] = [move1, move2]
+        self.history = [[0] * 4096, [0] * 4096]  # history[color][from_square << 6 | to_square]
+        self.pv_table = [[] for _ in range(MAX_PLY + 2)]  # pv_table[ply]: biến chính tính từ ply
+        self.node_count = 0  # Số nút đã duyệt trong lần tìm kiếm gần nhất
+        self.time_manager = None  # TimeManager của lần tìm kiếm đang chạy
+        self.stats = None  # SearchStats của lần tìm kiếm đang chạy (None = không thu thập)
+        # Khoá Zobrist của các thế cờ từ nước không thể đảo ngược gần nhất tới nút hiện tại (phát hiện lặp lại)
+        self.key_stack = []
+        self.root_color = chess.WHITE
+        self.null_moves = [False] * (MAX_PLY + 2)  # null_moves[ply]: nước dẫn tới ply + 1 là nước bỏ lượt
+
+    def set_option(self, name, value):
+        if name not in DEFAULT_OPTIONS:
+            raise ValueError(f"unknown engine option {name!r}")
+        self.options[name] = value
+
+    def set_hash_size(self, hash_mb):
+        """Đổi kích thước bảng chuyển vị (MB); nội dung cũ bị xoá."""
+        self.transposition_table.resize(hash_mb)
+
+    def set_tablebase(self, tb):
+        """Bật (hoặc tắt với None) tra cứu bảng tàn cuộc Syzygy trong tìm kiếm."""
+        self.tablebase = tb
+
+    def new_game(self):
+        """Xoá bảng chuyển vị, killer move và history trước một ván mới."""
+        self.transposition_table.clear()
+        self.clear_heuristics()
+
+    def clear_heuristics(self):
+        """Chỉ xoá killer move và history; bảng chuyển vị (có thể dùng chung) được giữ nguyên."""
+        for killers in self.killers:
+            killers[0] = killers[1] = None
+        self.history = [[0] * 4096, [0] * 4096]
+
+    def _new_search(self):
+        """Killer move của nước trước không còn đúng ply; history giữ lại một nửa."""
+        self.transposition_table.new_search()
+        for killers in self.killers:
+            killers[0] = killers[1] = None
+        self.history = [[value >> 1 for value in table] for table in self.history]
+        self.node_count = 0
+
+    def pick_moves(self, board, ply, tt_move):
+        """
+            Sinh nước đi theo từng giai đoạn, lười: nước trong bảng chuyển vị, nước ăn quân
+            (và phong cấp) có SEE >= 0, killer move, nước im lặng theo history, cuối cùng là
+            nước ăn quân bị lỗ. Beta cutoff ở giai đoạn sớm thì các giai đoạn sau không bao giờ
+            được sinh ra. Sinh ra các cặp (stage, move).
+        """
+        if tt_move is not None and board.is_pseudo_legal(tt_move) and board.is_legal(tt_move):
+            yield STAGE_TT, tt_move
+        else:
+            tt_move = None
+
+        promotions = board.generate_legal_moves(board.pawns, chess.BB_BACKRANKS & ~board.occupied)
+        captures = []
+        for move in list(board.generate_legal_captures()) + list(promotions):
+            if move != tt_move:
+                captures.append((see(board, move), move))
+        captures.sort(key=lambda x: x[0], reverse=True)
+        bad_captures = []
+        for gain, move in captures:
+            if gain >= 0:
+                yield STAGE_GOOD_CAPTURE, move
+            else:
+                bad_captures.append(move)
+
+        killers = []
+        for move in self.killers[ply]:
+            if move is not None and move != tt_move and not board.is_capture(move) and not move.promotion \
+                    and board.is_pseudo_legal(move) and board.is_legal(move):
+                killers.append(move)
+                yield STAGE_KILLER, move
+
+        history = self.history[board.turn]
+        quiets = [move for move in board.generate_legal_moves(to_mask=~board.occupied_co[not board.turn])
+                  if move != tt_move and move not in killers and not move.promotion
+                  and not board.is_en_passant(move)]
+        quiets.sort(key=lambda move: history[move.from_square << 6 | move.to_square], reverse=True)
+        for move in quiets:
+            yield STAGE_QUIET, move
+
+        for move in bad_captures:
+            yield STAGE_BAD_CAPTURE, move
+
+    def _draw_score(self, board):
+        """Điểm hoà theo góc nhìn bên đang đi: engine bị trừ contempt, đối thủ được cộng."""
+        contempt = self.options['contempt']
+        return -contempt if board.turn == self.root_color else contempt
+
+    def _is_repetition(self, hash_key, halfmove_clock):
+        """Thế cờ đã xuất hiện (cùng bên đi) từ nước ăn quân / đi tốt gần nhất, trong ván hoặc trên nhánh đang tìm."""
+        keys = self.key_stack
+        stop = max(len(keys) - halfmove_clock, 0)
+        for i in range(len(keys) - 4, stop - 1, -2):
+            if keys[i] == hash_key:
+                return True
+        return False
+
+    def _game_history(self, board):
+        """Khoá của các thế cờ trước board trong ván, từ nước không thể đảo ngược gần nhất."""
+        history = board.copy()
+        keys = []
+        for _ in range(min(board.halfmove_clock, len(board.move_stack))):
+            history.pop()
+            keys.append(zobrist_hash(history))
+        keys.reverse()
+        return keys
+
+    def _update_quiet_cutoff(self, board, move, depth, ply):
+        """Nước im lặng gây beta cutoff: thành killer move của ply này và được cộng history."""
+        if move.promotion is not None or board.is_capture(move):
+            return  # Nước ăn quân / phong cấp đã được xếp trước bằng SEE
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[board.turn][move.from_square << 6 | move.to_square] += depth * depth
+
+    def negamax(self, board, depth, alpha, beta, hash_key, eval_state, ply):
+        """
+            Tìm kiếm negamax với Principal Variation Search.
+            Điểm luôn tính theo góc nhìn của bên đang đi.
+        """
+        self.node_count += 1
+        if not self.node_count & (CHECK_INTERVAL - 1) and self.time_manager is not None \
+                and self.time_manager.hard_expired(self.node_count):
+            raise SearchAborted
+        pv = self.pv_table[ply]
+        pv.clear()
+        stats = self.stats
+        transposition_table = self.transposition_table
+
+        # Hoà: lặp lại thế cờ (chỉ cần một lần), luật 50 nước hoặc không đủ quân chiếu hết.
+        # Thế cờ thiếu vua (thế cờ thử hoặc vua đã bị ăn) không hoà vì thiếu quân hay hết nước.
+        if board.halfmove_clock >= 100 or self._is_repetition(hash_key, board.halfmove_clock) \
+                or (board.is_insufficient_material() and chess.popcount(board.kings) == 2):
+            return self._draw_score(board)
 
-    return best_move
\ No newline at end of file
+        tt_move = None
+        entry = transposition_table.probe(hash_key)
+        if stats is not None:
+            stats.tt_probes += 1
+        if entry is not None:
+            tt_value, tt_depth, tt_bound, tt_move = entry
+            tt_value = score_from_tt(tt_value, ply)
+            tt_move = decode_move(tt_move)
+            if stats is not None:
+                stats.tt_hits += 1
+            # Không cắt bằng bảng chuyển vị ở nút PV để giữ nguyên biến chính
+            if tt_depth >= depth and beta - alpha == 1 and (
+                    tt_bound == BOUND_EXACT
+                    or (tt_bound == BOUND_UPPER and tt_value <= alpha)
+                    or (tt_bound == BOUND_LOWER and tt_value >= beta)):
+                if stats is not None:
+                    stats.tt_cutoffs += 1
+                    if stats.trace is not None:
+                        stats.trace('tt_cutoff', {'ply': ply, 'depth': depth, 'value': tt_value, 'bound': tt_bound})
+                return tt_value
+
+        if self.tablebase is not None:
+            wdl = self.tablebase.probe_wdl(board, hash_key)
+            if wdl is not None:
+                if stats is not None:
+                    stats.tb_hits += 1
+                value = wdl_to_score(wdl, ply)
+                transposition_table.store(hash_key, score_to_tt(value, ply), depth, BOUND_EXACT)
+                return value
+
+        if depth == 0 or ply >= MAX_PLY:
+            value = self.quiescence(board, alpha, beta, eval_state, ply)
+            if value <= alpha:
+                bound = BOUND_UPPER
+            elif value >= beta:
+                bound = BOUND_LOWER
+            else:
+                bound = BOUND_EXACT
+            transposition_table.store(hash_key, score_to_tt(value, ply), 0, bound)
+            return value
+
+        alpha_orig = alpha
+        best_score = -INFINITY
+        best_move = None
+        in_check = board.is_check()
+        use_lmr = self.options['lmr'] and depth >= LMR_MIN_DEPTH and not in_check
+        options = self.options
+
+        # Cắt tỉa chọn lọc chỉ ở nút cửa sổ rỗng, không bị chiếu và khi điểm chưa phải chiếu hết
+        futile = False
+        if beta - alpha == 1 and not in_check and -DECISIVE_SCORE < alpha and beta < DECISIVE_SCORE:
+            static_eval = eval_state.evaluate(board)
+            if not board.turn:
+                static_eval = -static_eval
+
+            if options['reverse_futility'] and depth <= REVERSE_FUTILITY_DEPTH \
+                    and static_eval - REVERSE_FUTILITY_MARGIN * depth >= beta:
+                return static_eval
+
+            if options['razoring'] and depth < len(RAZOR_MARGINS) and static_eval + RAZOR_MARGINS[depth] <= alpha:
+                value = self.quiescence(board, alpha, beta, eval_state, ply)
+                if value <= alpha:
+                    return value
+
+            # Bỏ lượt mà vẫn >= beta thì nước thật gần như chắc chắn cũng vậy. Không bỏ lượt hai lần
+            # liên tiếp, và không dùng khi bên đi chỉ còn vua và tốt (zugzwang thường gặp).
+            if options['null_move'] and depth >= NULL_MOVE_MIN_DEPTH and static_eval >= beta \
+                    and not self.null_moves[ply - 1] \
+                    and board.occupied_co[board.turn] & ~(board.pawns | board.kings):
+                reduction = 3 if depth >= NULL_MOVE_DEEP else 2
+                null_hash_key = update_hash_key_null(board, hash_key)
+                self.key_stack.append(hash_key)
+                self.null_moves[ply] = True
+                board.push_null()
+                value = -self.negamax(board, max(depth - 1 - reduction, 0), -beta, -beta + 1, null_hash_key,
+                                      eval_state, ply + 1)
+                board.pop()
+                self.null_moves[ply] = False
+                self.key_stack.pop()
+                if value >= beta:
+                    # Không trả về điểm chiếu hết chưa được chứng minh
+                    return beta if value >= DECISIVE_SCORE else value
+
+            futile = options['futility'] and depth < len(FUTILITY_MARGINS) \
+                and static_eval + FUTILITY_MARGINS[depth] <= alpha
+
+        self.key_stack.append(hash_key)
+        for i, (stage, move) in enumerate(self.pick_moves(board, ply, tt_move)):
+            # Nước trong bảng chuyển vị có thể là nước ăn quân hoặc phong cấp
+            if stage == STAGE_TT:
+                is_capture = board.is_capture(move) or move.promotion is not None
+            else:
+                is_capture = stage in (STAGE_GOOD_CAPTURE, STAGE_BAD_CAPTURE)
+            # Futility pruning: nước im lặng không chiếu không thể kéo điểm lên tới alpha
+            if futile and i and stage == STAGE_QUIET and not board.gives_check(move):
+                continue
+            # Late move reduction: nước im lặng xếp muộn được tìm nông hơn
+            reduction = 0
+            if use_lmr and i >= LMR_MIN_MOVES and stage == STAGE_QUIET and not board.gives_check(move):
+                reduction = min(lmr_reductions[min(depth, MAX_PLY)][min(i, 63)], depth - 2)
+            new_hash_key = update_hash_key(board, move, hash_key)
+            eval_state.push(board, move)
+            board.push(move)
+            if i == 0:
+                score = -self.negamax(board, depth - 1, -beta, -alpha, new_hash_key, eval_state, ply + 1)
+            else:
+                # Cửa sổ rỗng: chỉ kiểm tra nước đi có tốt hơn alpha hay không
+                score = -self.negamax(board, depth - 1 - reduction, -alpha - 1, -alpha, new_hash_key, eval_state,
+                                      ply + 1)
+                if reduction and score > alpha:
+                    # Nước bị giảm độ sâu lại vượt alpha: tìm lại với độ sâu đầy đủ
+                    score = -self.negamax(board, depth - 1, -alpha - 1, -alpha, new_hash_key, eval_state, ply + 1)
+                if alpha < score < beta:
+                    score = -self.negamax(board, depth - 1, -beta, -alpha, new_hash_key, eval_state, ply + 1)
+            board.pop()
+            eval_state.pop()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+                pv[:] = [move]
+                pv.extend(self.pv_table[ply + 1])
+            if alpha >= beta:
+                if stats is not None:
+                    self._record_cutoff(board, move, i, is_capture, depth, ply)
+                if not is_capture:
+                    self._update_quiet_cutoff(board, move, depth, ply)
+                break
+        self.key_stack.pop()
+
+        if best_move is None:
+            # Bộ chọn nước không sinh ra nước nào: chiếu hết hoặc hết nước
+            if in_check:
+                return -MATE_SCORE + ply
+            if board.kings & board.occupied_co[board.turn]:
+                return self._draw_score(board)
+            value = eval_state.evaluate(board)
+            return value if board.turn else -value
+
+        if best_score <= alpha_orig:  # không vượt được alpha ban đầu, đây là upper bound
+            bound = BOUND_UPPER
+        elif best_score >= beta:  # beta cắt, đây là lower bound
+            bound = BOUND_LOWER
+        else:  # giá trị nằm giữa alpha và beta, exact
+            bound = BOUND_EXACT
+        transposition_table.store(hash_key, score_to_tt(best_score, ply), depth, bound, encode_move(best_move))
+        return best_score
+
+    def _record_cutoff(self, board, move, index, is_capture, depth, ply):
+        """Ghi nhận một beta cutoff vào stats (gọi trước khi cập nhật killer/history)."""
+        stats = self.stats
+        stats.beta_cutoffs += 1
+        if index == 0:
+            stats.first_move_cutoffs += 1
+        if not is_capture:
+            if move in self.killers[ply]:
+                stats.killer_hits += 1
+            elif self.history[board.turn][move.from_square << 6 | move.to_square] > 0:
+                stats.history_hits += 1
+        if stats.trace is not None:
+            stats.trace('cutoff', {'ply': ply, 'depth': depth, 'move': move.uci(), 'index': index,
+                                   'capture': is_capture})
+
+    def quiescence(self, board, alpha, beta, eval_state, ply):
+        """
+            Tìm kiếm tĩnh: chỉ xét nước ăn quân và phong cấp (hoặc mọi nước thoát chiếu) để tránh
+            hiệu ứng đường chân trời. Dùng stand-pat, delta pruning và bỏ các nước ăn quân có SEE âm.
+        """
+        self.node_count += 1
+        if not self.node_count & (CHECK_INTERVAL - 1) and self.time_manager is not None \
+                and self.time_manager.hard_expired(self.node_count):
+            raise SearchAborted
+        if self.stats is not None:
+            self.stats.qnodes += 1
+
+        stand_pat = eval_state.evaluate(board)
+        if not board.turn:
+            stand_pat = -stand_pat
+        if ply >= MAX_PLY:
+            return stand_pat
+
+        in_check = board.is_check()
+        if in_check:
+            best_score = -INFINITY
+            candidates = [(0, move) for move in board.legal_moves]
+            if not candidates:
+                return -MATE_SCORE + ply  # Bị chiếu và không còn nước: chiếu hết
+        else:
+            if stand_pat >= beta:
+                return stand_pat
+            if stand_pat > alpha:
+                alpha = stand_pat
+            best_score = stand_pat
+
+            candidates = []
+            promotions = board.generate_legal_moves(board.pawns, chess.BB_BACKRANKS & ~board.occupied)
+            for move in list(board.generate_legal_captures()) + list(promotions):
+                if move.promotion and move.promotion != chess.QUEEN:
+                    continue  # Phong cấp dưới hậu không đáng xét trong quiescence
+                victim = board.piece_type_at(move.to_square)
+                gain = piece_values[victim] if victim else (0 if move.promotion else piece_values[chess.PAWN])
+                if move.promotion:
+                    gain += piece_values[move.promotion] - piece_values[chess.PAWN]
+                # Delta pruning: kể cả ăn được quân cũng không kéo điểm lên tới alpha
+                if stand_pat + gain + DELTA_MARGIN <= alpha:
+                    continue
+                exchange = see(board, move)
+                if exchange < 0:
+                    continue
+                candidates.append((exchange, move))
+            candidates.sort(key=lambda x: x[0], reverse=True)
+
+        for _, move in candidates:
+            eval_state.push(board, move)
+            board.push(move)
+            score = -self.quiescence(board, -beta, -alpha, eval_state, ply + 1)
+            board.pop()
+            eval_state.pop()
+
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    def search_root(self, board, depth, alpha, beta, root_moves, root_scores, hash_key, eval_state):
+        """
+            Tìm kiếm tại gốc với một cặp alpha/beta dùng chung cho mọi nước đi (PVS).
+            root_scores[move] ghi lại điểm của từng nước để sắp xếp cho vòng lặp sau.
+            Trả về (best_score, best_move, pv).
+        """
+        self.node_count += 1
+        alpha_orig = alpha
+        best_score = -INFINITY
+        best_move = None
+        best_pv = []
+
+        for i, move in enumerate(root_moves):
+            new_hash_key = update_hash_key(board, move, hash_key)
+            eval_state.push(board, move)
+            board.push(move)
+            if i == 0:
+                score = -self.negamax(board, depth - 1, -beta, -alpha, new_hash_key, eval_state, 1)
+            else:
+                score = -self.negamax(board, depth - 1, -alpha - 1, -alpha, new_hash_key, eval_state, 1)
+                if alpha < score < beta:
+                    score = -self.negamax(board, depth - 1, -beta, -alpha, new_hash_key, eval_state, 1)
+            board.pop()
+            eval_state.pop()
+
+            root_scores[move] = score
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+                best_pv = [move] + self.pv_table[1]
+                if alpha >= beta:
+                    break
+
+        if best_score <= alpha_orig:
+            bound = BOUND_UPPER
+        elif best_score >= beta:
+            bound = BOUND_LOWER
+        else:
+            bound = BOUND_EXACT
+        self.transposition_table.store(hash_key, best_score, depth, bound, encode_move(best_move))
+        return best_score, best_move, best_pv
+
+    def search(self, board, max_depth=6, margin=ASPIRATION_WINDOW_MARGIN, movetime=None, time_left=None,
+               increment=0.0, moves_to_go=None, manager=None, start_depth=1, on_iteration=None,
+               search_stats=None):
+        """
+            Iterative deepening tại gốc. Danh sách nước đi ở gốc được sắp xếp lại sau mỗi vòng
+            theo điểm của vòng trước (nước tốt nhất lên đầu), và mỗi vòng dùng Aspiration Window
+            quanh điểm vòng trước, nới rộng dần khi fail high/low.
+            Thời gian: movetime (giây cho nước này), hoặc time_left + increment của bên đang đi,
+            hoặc một TimeManager dựng sẵn (manager). Mặc định giới hạn MAX_TIME giây.
+            Khi hết giờ giữa chừng, luôn trả về kết quả của vòng lặp đã hoàn thành gần nhất.
+            start_depth > 1 bỏ qua các vòng nông (dùng cho luồng phụ của tìm kiếm song song).
+            on_iteration(result) được gọi sau mỗi vòng lặp hoàn thành (ví dụ để in dòng info UCI).
+            search_stats: một SearchStats (stats.py) để thu thập thống kê; được gắn vào result.stats.
+        """
+        if manager is None:
+            if movetime is None and time_left is None:
+                movetime = MAX_TIME
+            manager = TimeManager(movetime=movetime, time_left=time_left, increment=increment,
+                                  moves_to_go=moves_to_go)
+        self.time_manager = manager
+        self.stats = search_stats
+        if search_stats is not None:
+            search_stats.reset()
+        self._new_search()
+
+        # Thế cờ ở gốc có trong bảng tàn cuộc: chọn nước theo DTZ, không cần tìm kiếm
+        root_probe = self.tablebase.probe_root(board) if self.tablebase is not None else None
+        if root_probe is not None:
+            move, wdl = root_probe
+            result = SearchResult(move, wdl_to_score(wdl, 0), 1, [move], 0, search_stats)
+            if on_iteration is not None:
+                on_iteration(result)
+            self.time_manager = self.stats = None
+            return result
+
+        # Tìm kiếm chạy trên Position (push/pop nhẹ hơn chess.Board); board của người gọi không bị đổi
+        position = Position.from_board(board)
+        hash_key = zobrist_hash(board)
+        self.root_color = board.turn
+        self.key_stack = self._game_history(board) + [hash_key]
+        self.null_moves = [False] * (MAX_PLY + 2)  # Lần tìm kiếm trước có thể bị ngắt giữa một nước bỏ lượt
+        eval_state = EvalState(position)
+        entry = self.transposition_table.probe(hash_key)
+        tt_move = decode_move(entry[3]) if entry is not None else None
+        root_moves = [move for _, move in self.pick_moves(position, 0, tt_move)]
+        root_scores = {}
+
+        result = SearchResult(root_moves[0] if root_moves else None, 0, 0, [], 0, search_stats)
+        if not root_moves:
+            self.time_manager = self.stats = None
+            return result
+
+        try:
+            for depth in range(start_depth, max_depth + 1):
+                if depth > start_depth and manager.soft_expired(self.node_count):
+                    break
+
+                delta = margin
+                if depth > start_depth:
+                    alpha = max(result.score - delta, -INFINITY)
+                    beta = min(result.score + delta, INFINITY)
+                else:
+                    alpha, beta = -INFINITY, INFINITY
+
+                while True:
+                    score, move, pv = self.search_root(position, depth, alpha, beta, root_moves, root_scores,
+                                                       hash_key, eval_state)
+                    if score <= alpha and alpha > -INFINITY:
+                        # Fail low: hạ alpha, kéo beta về giữa cửa sổ cũ
+                        beta = (alpha + beta) // 2
+                        alpha = max(score - delta, -INFINITY)
+                    elif score >= beta and beta < INFINITY:
+                        beta = min(score + delta, INFINITY)
+                    else:
+                        break
+                    delta *= 2
+                    root_scores.clear()
+
+                # Nước tốt nhất lên đầu, các nước còn lại theo điểm vòng này (sort ổn định)
+                root_moves.sort(key=lambda m: INFINITY if m == move else root_scores.get(m, -INFINITY),
+                                reverse=True)
+                result = SearchResult(move, score, depth, pv or [move], self.node_count, search_stats)
+                if search_stats is not None:
+                    search_stats.nodes = self.node_count - search_stats.qnodes
+                    search_stats.iterations.append({'depth': depth, 'score': score, 'move': move.uci(),
+                                                    'nodes': self.node_count, 'time': manager.elapsed()})
+                    if search_stats.trace is not None:
+                        search_stats.trace('iteration', search_stats.iterations[-1])
+                if on_iteration is not None:
+                    on_iteration(result)
+        except SearchAborted:
+            logger.info("Timeout reached! Returning the best move found so far.")
+            result = result._replace(nodes=self.node_count)
+        finally:
+            if search_stats is not None:
+                search_stats.nodes = self.node_count - search_stats.qnodes
+            self.time_manager = self.stats = None
+
+        return result
+
+
+default_engine = Engine()  # Engine dùng chung cho các hàm cấp module bên dưới
+
+
+def set_hash_size(hash_mb):
+    """Đổi kích thước bảng chuyển vị (MB) của engine mặc định; nội dung cũ bị xoá."""
+    default_engine.set_hash_size(hash_mb)
+
+
+def set_tablebase(tb):
+    """Bật (hoặc tắt với None) tra cứu bảng tàn cuộc Syzygy cho engine mặc định."""
+    default_engine.set_tablebase(tb)
+
+
+def new_game():
+    """Bắt đầu ván mới trên engine mặc định."""
+    default_engine.new_game()
+
+
+def search(board, max_depth=6, margin=ASPIRATION_WINDOW_MARGIN, movetime=None, time_left=None,
+           increment=0.0, moves_to_go=None, manager=None, start_depth=1, on_iteration=None,
+           search_stats=None):
+    """Engine.search trên engine mặc định."""
+    return default_engine.search(board, max_depth, margin, movetime, time_left, increment, moves_to_go,
+                                 manager, start_depth, on_iteration, search_stats)
+
+
+def get_best_move(board, max_depth=6, margin=ASPIRATION_WINDOW_MARGIN, movetime=None, time_left=None,
+                  increment=0.0, moves_to_go=None, manager=None, threads=1, stats=None, book=None,
+                  engine=None):
+    """
+        Nước đi tốt nhất cho bên đang đi; xem search() để biết ý nghĩa các tham số.
+        threads > 1 tìm kiếm song song bằng Lazy SMP trên nhiều tiến trình (xem smp.py).
+        stats: truyền một SearchStats để nhận thống kê của lần tìm kiếm (stats.to_json()).
+        book: một book.PolyglotBook; khi thế cờ còn trong sách thì trả nước đi sách, không tìm kiếm.
+        engine: Engine dùng để tìm kiếm (mặc định là default_engine); với threads > 1, tuỳ chọn và
+        bảng tàn cuộc của nó được chép sang engine của nhóm tiến trình.
+    """
+    if book is not None:
+        book_move = book.choose(board)
+        if book_move is not None:
+            return book_move
+    engine = engine or default_engine
+    if threads > 1:
+        from smp import get_pool
+        pool = get_pool(threads)
+        pool.engine.options.update(engine.options)
+        pool.engine.set_tablebase(engine.tablebase)
+        result = pool.search(board, max_depth, margin, movetime, time_left, increment, moves_to_go, manager,
+                             search_stats=stats)
+        return result.move
+    return engine.search(board, max_depth, margin, movetime, time_left, increment, moves_to_go, manager,
+                         search_stats=stats).move
@@ -0,0 +1,188 @@
+"""
+    Perft: đếm số nút lá tới một độ sâu để kiểm tra bộ sinh nước đi (position.Position) và đo tốc độ.
+    Có divide (số nút theo từng nước ở gốc), bảng băm Zobrist lưu số nút của cây con đã đếm,
+    và chia các nước ở gốc cho nhiều tiến trình.
+
+        python perft.py --depth 5                                  # thế cờ ban đầu
+        python perft.py "r3k2r/p1ppqpb1/... w KQkq - 0 1" --depth 4 --divide
+        python perft.py --suite --max-nodes 5000000 --hash 64 --workers 4
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+
+import chess
+
+from minmax import update_hash_key, zobrist_hash
+from position import Position
+
+# Bộ perft chuẩn (chessprogramming.org/Perft_Results): nhập thành, bắt tốt qua đường, phong cấp, ghim
+SUITE = [
+    (chess.STARTING_FEN, [20, 400, 8902, 197281, 4865609]),
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862, 4085603]),
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467, 422333]),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+    ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890, 3894594]),
+]
+
+ENTRY_BYTES = 100  # Ước lượng bộ nhớ mỗi ô của PerftTable (hai phần tử list + số nguyên Python)
+DEPTH_KEY = 0x9E3779B97F4A7C15  # Trộn độ sâu vào khoá: cùng thế cờ, khác độ sâu là hai mục khác nhau
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+class PerftTable:
+    """Bảng băm kích thước cố định, luôn ghi đè: (khoá Zobrist, độ sâu) -> số nút lá."""
+
+    def __init__(self, size_mb=16):
+        entries = max(int(size_mb * 1024 * 1024 / ENTRY_BYTES), 1024)
+        self.size = 1 << (entries.bit_length() - 1)
+        self.mask = self.size - 1
+        self.keys = [None] * self.size
+        self.counts = [0] * self.size
+        self.hits = 0
+
+    def probe(self, key, depth):
+        slot_key = key ^ (depth * DEPTH_KEY & MASK64)
+        index = slot_key & self.mask
+        if self.keys[index] == slot_key:
+            self.hits += 1
+            return self.counts[index]
+        return None
+
+    def store(self, key, depth, count):
+        slot_key = key ^ (depth * DEPTH_KEY & MASK64)
+        index = slot_key & self.mask
+        self.keys[index] = slot_key
+        self.counts[index] = count
+
+
+def perft(position, depth, table=None, key=None):
+    """Số nút lá sau đúng depth nước; ở độ sâu 1 chỉ đếm số nước hợp lệ (bulk counting)."""
+    if depth <= 0:
+        return 1
+    if depth == 1:
+        return sum(1 for _ in position.generate_legal_moves())
+    if table is not None:
+        if key is None:
+            key = zobrist_hash(position)
+        count = table.probe(key, depth)
+        if count is not None:
+            return count
+
+    count = 0
+    for move in list(position.generate_legal_moves()):
+        child_key = update_hash_key(position, move, key) if table is not None else None
+        position.push(move)
+        count += perft(position, depth - 1, table, child_key)
+        position.pop()
+
+    if table is not None:
+        table.store(key, depth, count)
+    return count
+
+
+_table = None
+
+
+def _worker_init(hash_mb):
+    global _table
+    _table = PerftTable(hash_mb) if hash_mb else None
+
+
+def _perft_move(task):
+    fen, move, depth = task
+    position = Position(fen)
+    position.push(move)
+    return move, perft(position, depth - 1, _table)
+
+
+def divide(position, depth, table=None, workers=1, hash_mb=0):
+    """
+        [(nước đi, số nút lá của cây con)] theo thứ tự sinh nước. workers > 1 đếm mỗi nước ở gốc
+        trong một tiến trình riêng, mỗi tiến trình có bảng băm hash_mb MB của riêng nó.
+    """
+    moves = list(position.generate_legal_moves())
+    if workers > 1 and depth > 1:
+        fen = position.fen()
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(workers, initializer=_worker_init, initargs=(hash_mb,)) as pool:
+            counts = dict(pool.imap_unordered(_perft_move, [(fen, move, depth) for move in moves]))
+        return [(move, counts[move]) for move in moves]
+
+    results = []
+    for move in moves:
+        position.push(move)
+        results.append((move, perft(position, depth - 1, table)))
+        position.pop()
+    return results
+
+
+def run(fen, depth, workers=1, hash_mb=0):
+    """Đếm perft cho fen; trả về (số nút, số giây)."""
+    position = Position(fen)
+    table = PerftTable(hash_mb) if hash_mb and workers <= 1 else None
+    start = time.perf_counter()
+    if workers > 1:
+        nodes = sum(count for _, count in divide(position, depth, workers=workers, hash_mb=hash_mb))
+    else:
+        nodes = perft(position, depth, table)
+    return nodes, time.perf_counter() - start
+
+
+def run_suite(max_nodes=1000000, workers=1, hash_mb=0, verbose=True):
+    """
+        Chạy bộ perft chuẩn tới độ sâu lớn nhất có số nút không quá max_nodes ở mỗi thế cờ.
+        Trả về danh sách (fen, độ sâu, số nút, số nút đúng, số giây).
+    """
+    results = []
+    for fen, expected in SUITE:
+        for depth, count in enumerate(expected, 1):
+            if count > max_nodes:
+                break
+            nodes, elapsed = run(fen, depth, workers, hash_mb)
+            results.append((fen, depth, nodes, count, elapsed))
+            if verbose:
+                status = "ok" if nodes == count else f"FAIL (expected {count})"
+                print(f"{fen}  depth {depth}: {nodes} {status}  {nodes / max(elapsed, 1e-9):.0f} nps")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft for the engine's move generator")
+    parser.add_argument("fen", nargs="?", default=chess.STARTING_FEN)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--divide", action="store_true", help="in số nút theo từng nước ở gốc")
+    parser.add_argument("--hash", type=int, default=0, help="bảng băm cây con (MB), 0 = tắt")
+    parser.add_argument("--workers", type=int, default=1, help="số tiến trình chia các nước ở gốc")
+    parser.add_argument("--suite", action="store_true", help="kiểm tra với bộ perft chuẩn")
+    parser.add_argument("--max-nodes", type=int, default=1000000, help="giới hạn số nút mỗi dòng của --suite")
+    args = parser.parse_args()
+
+    if args.suite:
+        results = run_suite(args.max_nodes, args.workers, args.hash)
+        nodes = sum(result[2] for result in results)
+        elapsed = sum(result[4] for result in results)
+        failed = [result for result in results if result[2] != result[3]]
+        print(f"{len(results) - len(failed)}/{len(results)} passed, {nodes} nodes, "
+              f"{nodes / max(elapsed, 1e-9):.0f} nps")
+        sys.exit(1 if failed else 0)
+
+    if args.divide:
+        start = time.perf_counter()
+        table = PerftTable(args.hash) if args.hash else None
+        results = divide(Position(args.fen), args.depth, table, args.workers, args.hash)
+        elapsed = time.perf_counter() - start
+        for move, count in results:
+            print(f"{move.uci()}: {count}")
+        nodes = sum(count for _, count in results)
+        print(f"\nMoves: {len(results)}")
+    else:
+        nodes, elapsed = run(args.fen, args.depth, args.workers, args.hash)
+    print(f"Nodes: {nodes}")
+    print(f"Time: {elapsed:.3f}s ({nodes / max(elapsed, 1e-9):.0f} nps)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,540 @@
+"""
+    Thế cờ gọn dùng riêng cho tìm kiếm: bitboard số nguyên + mailbox 64 ô, __slots__,
+    push/pop chỉ lưu và khôi phục một bản ghi nhỏ thay vì toàn bộ trạng thái như chess.Board.
+    Có cùng tên phương thức với phần chess.Board mà minmax.py dùng (piece_type_at, pieces_mask,
+    generate_legal_moves, is_legal, gives_check, ...) nên see(), update_hash_key() và bộ chọn
+    nước đi chạy được trên cả hai. Sinh nước đi theo đúng thứ tự của python-chess: nước giả hợp lệ
+    rồi lọc bằng quân bị ghim / nước thoát chiếu, không phải đi thử từng nước.
+    Thế cờ không có vua vẫn sinh được nước (mọi nước giả hợp lệ đều coi là hợp lệ).
+    Chỉ hỗ trợ cờ vua chuẩn (không Chess960); chuyển đổi với chess.Board qua from_board()/to_board().
+"""
+import chess
+from chess import (BB_ALL, BB_DIAG_ATTACKS, BB_DIAG_MASKS, BB_FILE_ATTACKS, BB_FILE_MASKS, BB_KING_ATTACKS,
+                   BB_KNIGHT_ATTACKS, BB_PAWN_ATTACKS, BB_RANK_ATTACKS, BB_RANK_MASKS, BB_SQUARES, BISHOP, KING,
+                   KNIGHT, PAWN, QUEEN, ROOK, Move, between, msb, popcount, ray, scan_reversed)
+
+BB_BACKRANKS = chess.BB_BACKRANKS
+PROMOTIONS = (QUEEN, ROOK, BISHOP, KNIGHT)  # Cùng thứ tự với python-chess
+
+
+class Position:
+    __slots__ = ('pawns', 'knights', 'bishops', 'rooks', 'queens', 'kings', 'occupied_co', 'occupied',
+                 'mailbox', 'turn', 'castling_rights', 'ep_square', 'halfmove_clock', 'fullmove_number',
+                 '_stack')
+
+    def __init__(self, fen=chess.STARTING_FEN):
+        self._set_board(chess.Board(fen))
+
+    @classmethod
+    def from_board(cls, board):
+        position = cls.__new__(cls)
+        position._set_board(board)
+        return position
+
+    def _set_board(self, board):
+        self.pawns = board.pawns
+        self.knights = board.knights
+        self.bishops = board.bishops
+        self.rooks = board.rooks
+        self.queens = board.queens
+        self.kings = board.kings
+        self.occupied_co = [board.occupied_co[chess.BLACK], board.occupied_co[chess.WHITE]]
+        self.occupied = board.occupied
+        self.mailbox = [board.piece_type_at(square) or 0 for square in chess.SQUARES]
+        self.turn = board.turn
+        self.castling_rights = board.clean_castling_rights()
+        self.ep_square = board.ep_square
+        self.halfmove_clock = board.halfmove_clock
+        self.fullmove_number = board.fullmove_number
+        self._stack = []
+
+    def to_board(self):
+        """chess.Board tương ứng (không có lịch sử nước đi)."""
+        board = chess.Board(None)
+        board.pawns, board.knights, board.bishops = self.pawns, self.knights, self.bishops
+        board.rooks, board.queens, board.kings = self.rooks, self.queens, self.kings
+        board.occupied_co[chess.WHITE] = self.occupied_co[chess.WHITE]
+        board.occupied_co[chess.BLACK] = self.occupied_co[chess.BLACK]
+        board.occupied = self.occupied
+        board.turn = self.turn
+        board.castling_rights = self.castling_rights
+        board.ep_square = self.ep_square
+        board.halfmove_clock = self.halfmove_clock
+        board.fullmove_number = self.fullmove_number
+        return board
+
+    def fen(self):
+        return self.to_board().fen()
+
+    def __repr__(self):
+        return f"Position({self.fen()!r})"
+
+    # Truy vấn bàn cờ
+
+    def piece_type_at(self, square):
+        """Loại quân trên ô, 0 nếu ô trống (chess.Board trả về None)."""
+        return self.mailbox[square]
+
+    def pieces_mask(self, piece_type, color):
+        if piece_type == PAWN:
+            bb = self.pawns
+        elif piece_type == KNIGHT:
+            bb = self.knights
+        elif piece_type == BISHOP:
+            bb = self.bishops
+        elif piece_type == ROOK:
+            bb = self.rooks
+        elif piece_type == QUEEN:
+            bb = self.queens
+        else:
+            bb = self.kings
+        return bb & self.occupied_co[color]
+
+    def king(self, color):
+        king_mask = self.occupied_co[color] & self.kings
+        return msb(king_mask) if king_mask else None
+
+    def clean_castling_rights(self):
+        return self.castling_rights  # Luôn được giữ sạch trong push()
+
+    def attacks_mask(self, square):
+        bb_square = BB_SQUARES[square]
+        if bb_square & self.pawns:
+            return BB_PAWN_ATTACKS[bool(bb_square & self.occupied_co[1])][square]
+        elif bb_square & self.knights:
+            return BB_KNIGHT_ATTACKS[square]
+        elif bb_square & self.kings:
+            return BB_KING_ATTACKS[square]
+        attacks = 0
+        if bb_square & (self.bishops | self.queens):
+            attacks = BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & self.occupied]
+        if bb_square & (self.rooks | self.queens):
+            attacks |= (BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & self.occupied]
+                        | BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & self.occupied])
+        return attacks
+
+    def attackers_mask(self, color, square, occupied=None):
+        if occupied is None:
+            occupied = self.occupied
+        queens_and_rooks = self.queens | self.rooks
+        queens_and_bishops = self.queens | self.bishops
+        attackers = (
+            (BB_KING_ATTACKS[square] & self.kings)
+            | (BB_KNIGHT_ATTACKS[square] & self.knights)
+            | (BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied] & queens_and_rooks)
+            | (BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied] & queens_and_rooks)
+            | (BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied] & queens_and_bishops)
+            | (BB_PAWN_ATTACKS[not color][square] & self.pawns))
+        return attackers & self.occupied_co[color]
+
+    def is_attacked_by(self, color, square):
+        return bool(self.attackers_mask(color, square))
+
+    def checkers_mask(self):
+        king = self.king(self.turn)
+        return 0 if king is None else self.attackers_mask(not self.turn, king)
+
+    def is_check(self):
+        return bool(self.checkers_mask())
+
+    def pin_mask(self, color, square):
+        king = self.king(color)
+        if king is None:
+            return BB_ALL
+        square_mask = BB_SQUARES[square]
+        for attacks, sliders in ((BB_FILE_ATTACKS, self.rooks | self.queens),
+                                 (BB_RANK_ATTACKS, self.rooks | self.queens),
+                                 (BB_DIAG_ATTACKS, self.bishops | self.queens)):
+            rays = attacks[king][0]
+            if rays & square_mask:
+                for sniper in scan_reversed(rays & sliders & self.occupied_co[not color]):
+                    if between(sniper, king) & (self.occupied | square_mask) == square_mask:
+                        return ray(king, sniper)
+                break
+        return BB_ALL
+
+    # Phân loại nước đi (nước phải giả hợp lệ)
+
+    def is_en_passant(self, move):
+        return (self.ep_square == move.to_square and bool(self.pawns & BB_SQUARES[move.from_square])
+                and abs(move.to_square - move.from_square) in (7, 9)
+                and not self.occupied & BB_SQUARES[move.to_square])
+
+    def is_capture(self, move):
+        touched = BB_SQUARES[move.from_square] ^ BB_SQUARES[move.to_square]
+        return bool(touched & self.occupied_co[not self.turn]) or self.is_en_passant(move)
+
+    def is_castling(self, move):
+        return bool(self.kings & BB_SQUARES[move.from_square]) and \
+            abs((move.from_square & 7) - (move.to_square & 7)) > 1
+
+    def gives_check(self, move):
+        self.push(move)
+        try:
+            return self.is_check()
+        finally:
+            self.pop()
+
+    # Sinh nước đi
+
+    def generate_pseudo_legal_moves(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        # Duyệt bit từ ô cao xuống ô thấp như chess.scan_reversed, viết thẳng vòng lặp cho nhanh
+        turn = self.turn
+        our_pieces = self.occupied_co[turn]
+        attacks_mask = self.attacks_mask
+
+        non_pawns = our_pieces & ~self.pawns & from_mask
+        while non_pawns:
+            from_square = non_pawns.bit_length() - 1
+            non_pawns ^= BB_SQUARES[from_square]
+            targets = attacks_mask(from_square) & ~our_pieces & to_mask
+            while targets:
+                to_square = targets.bit_length() - 1
+                targets ^= BB_SQUARES[to_square]
+                yield Move(from_square, to_square)
+
+        if from_mask & self.kings:
+            yield from self.generate_castling_moves(from_mask, to_mask)
+
+        pawns = self.pawns & our_pieces & from_mask
+        if not pawns:
+            return
+
+        targets_mask = self.occupied_co[not turn] & to_mask
+        pawn_attacks = BB_PAWN_ATTACKS[turn]
+        capturers = pawns
+        while capturers:
+            from_square = capturers.bit_length() - 1
+            capturers ^= BB_SQUARES[from_square]
+            targets = pawn_attacks[from_square] & targets_mask
+            while targets:
+                to_square = targets.bit_length() - 1
+                targets ^= BB_SQUARES[to_square]
+                if BB_SQUARES[to_square] & BB_BACKRANKS:
+                    for promotion in PROMOTIONS:
+                        yield Move(from_square, to_square, promotion)
+                else:
+                    yield Move(from_square, to_square)
+
+        empty = ~self.occupied
+        if turn:
+            single_moves = pawns << 8 & empty
+            double_moves = single_moves << 8 & empty & (chess.BB_RANK_3 | chess.BB_RANK_4)
+            step = -8
+        else:
+            single_moves = pawns >> 8 & empty
+            double_moves = single_moves >> 8 & empty & (chess.BB_RANK_6 | chess.BB_RANK_5)
+            step = 8
+        single_moves &= to_mask
+        while single_moves:
+            to_square = single_moves.bit_length() - 1
+            single_moves ^= BB_SQUARES[to_square]
+            if BB_SQUARES[to_square] & BB_BACKRANKS:
+                for promotion in PROMOTIONS:
+                    yield Move(to_square + step, to_square, promotion)
+            else:
+                yield Move(to_square + step, to_square)
+        double_moves &= to_mask
+        while double_moves:
+            to_square = double_moves.bit_length() - 1
+            double_moves ^= BB_SQUARES[to_square]
+            yield Move(to_square + 2 * step, to_square)
+
+        if self.ep_square:
+            yield from self.generate_pseudo_legal_ep(from_mask, to_mask)
+
+    def generate_pseudo_legal_ep(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        ep_square = self.ep_square
+        if not ep_square or not BB_SQUARES[ep_square] & to_mask or BB_SQUARES[ep_square] & self.occupied:
+            return
+        capturers = (self.pawns & self.occupied_co[self.turn] & from_mask
+                     & BB_PAWN_ATTACKS[not self.turn][ep_square] & chess.BB_RANKS[4 if self.turn else 3])
+        for capturer in scan_reversed(capturers):
+            yield Move(capturer, ep_square)
+
+    def _attacked_for_king(self, path, occupied):
+        return any(self.attackers_mask(not self.turn, square, occupied) for square in scan_reversed(path))
+
+    def generate_castling_moves(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        backrank = chess.BB_RANK_1 if self.turn else chess.BB_RANK_8
+        king = self.occupied_co[self.turn] & self.kings & backrank & from_mask
+        king &= -king
+        if not king:
+            return
+        king_square = msb(king)
+        for candidate in scan_reversed(self.castling_rights & backrank & to_mask):
+            rook = BB_SQUARES[candidate]
+            a_side = rook < king
+            king_to = king_square - 2 if a_side else king_square + 2
+            rook_to = king_square - 1 if a_side else king_square + 1
+            king_path = between(king_square, king_to)
+            rook_path = between(candidate, rook_to)
+            king_to_bb = BB_SQUARES[king_to]
+            rook_to_bb = BB_SQUARES[rook_to]
+            if not ((self.occupied ^ king ^ rook) & (king_path | rook_path | king_to_bb | rook_to_bb)
+                    or self._attacked_for_king(king_path | king, self.occupied ^ king)
+                    or self._attacked_for_king(king_to_bb, self.occupied ^ king ^ rook ^ rook_to_bb)):
+                yield Move(king_square, king_to)
+
+    def _ep_skewered(self, king, capturer):
+        # Vua bị chiếu theo hàng ngang (hoặc chéo) khi cả tốt bị bắt và tốt bắt cùng rời hàng
+        last_double = self.ep_square + (-8 if self.turn else 8)
+        occupancy = self.occupied & ~BB_SQUARES[last_double] & ~BB_SQUARES[capturer] | BB_SQUARES[self.ep_square]
+        them = self.occupied_co[not self.turn]
+        if BB_RANK_ATTACKS[king][BB_RANK_MASKS[king] & occupancy] & them & (self.rooks | self.queens):
+            return True
+        return bool(BB_DIAG_ATTACKS[king][BB_DIAG_MASKS[king] & occupancy] & them & (self.bishops | self.queens))
+
+    def _slider_blockers(self, king):
+        rooks_and_queens = self.rooks | self.queens
+        bishops_and_queens = self.bishops | self.queens
+        snipers = ((BB_RANK_ATTACKS[king][0] & rooks_and_queens)
+                   | (BB_FILE_ATTACKS[king][0] & rooks_and_queens)
+                   | (BB_DIAG_ATTACKS[king][0] & bishops_and_queens))
+        blockers = 0
+        for sniper in scan_reversed(snipers & self.occupied_co[not self.turn]):
+            b = between(king, sniper) & self.occupied
+            if b and BB_SQUARES[msb(b)] == b:  # Đúng một quân đứng giữa
+                blockers |= b
+        return blockers & self.occupied_co[self.turn]
+
+    def _is_safe(self, king, blockers, move):
+        from_square = move.from_square
+        if from_square == king:
+            if self.is_castling(move):
+                return True
+            return not self.attackers_mask(not self.turn, move.to_square)
+        elif self.is_en_passant(move):
+            return bool(self.pin_mask(self.turn, from_square) & BB_SQUARES[move.to_square]
+                        and not self._ep_skewered(king, from_square))
+        return bool(not blockers & BB_SQUARES[from_square] or ray(from_square, move.to_square) & BB_SQUARES[king])
+
+    def _generate_evasions(self, king, checkers, from_mask=BB_ALL, to_mask=BB_ALL):
+        sliders = checkers & (self.bishops | self.rooks | self.queens)
+        attacked = 0
+        for checker in scan_reversed(sliders):
+            attacked |= ray(king, checker) & ~BB_SQUARES[checker]
+
+        if BB_SQUARES[king] & from_mask:
+            for to_square in scan_reversed(BB_KING_ATTACKS[king] & ~self.occupied_co[self.turn] & ~attacked & to_mask):
+                yield Move(king, to_square)
+
+        checker = msb(checkers)
+        if BB_SQUARES[checker] == checkers:
+            # Ăn hoặc chặn quân chiếu duy nhất
+            target = between(king, checker) | checkers
+            yield from self.generate_pseudo_legal_moves(~self.kings & from_mask, target & to_mask)
+            # Bắt qua đường tốt đang chiếu
+            if self.ep_square and not BB_SQUARES[self.ep_square] & target:
+                if self.ep_square + (-8 if self.turn else 8) == checker:
+                    yield from self.generate_pseudo_legal_ep(from_mask, to_mask)
+
+    def generate_legal_moves(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        king_mask = self.kings & self.occupied_co[self.turn]
+        if not king_mask:
+            yield from self.generate_pseudo_legal_moves(from_mask, to_mask)
+            return
+        king = msb(king_mask)
+        blockers = self._slider_blockers(king)
+        checkers = self.attackers_mask(not self.turn, king)
+        if checkers:
+            moves = self._generate_evasions(king, checkers, from_mask, to_mask)
+        else:
+            moves = self.generate_pseudo_legal_moves(from_mask, to_mask)
+        for move in moves:
+            if self._is_safe(king, blockers, move):
+                yield move
+
+    def generate_legal_ep(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        for move in self.generate_pseudo_legal_ep(from_mask, to_mask):
+            if not self.is_into_check(move):
+                yield move
+
+    def generate_legal_captures(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        yield from self.generate_legal_moves(from_mask, to_mask & self.occupied_co[not self.turn])
+        yield from self.generate_legal_ep(from_mask, to_mask)
+
+    @property
+    def legal_moves(self):
+        return list(self.generate_legal_moves())
+
+    def is_pseudo_legal(self, move):
+        if not move or move.drop:
+            return False
+        from_square = move.from_square
+        piece = self.mailbox[from_square]
+        from_mask = BB_SQUARES[from_square]
+        to_mask = BB_SQUARES[move.to_square]
+        if not piece or not self.occupied_co[self.turn] & from_mask:
+            return False
+        if move.promotion:
+            if piece != PAWN or not to_mask & (chess.BB_RANK_8 if self.turn else chess.BB_RANK_1):
+                return False
+        if piece == KING and move in self.generate_castling_moves():
+            return True
+        if self.occupied_co[self.turn] & to_mask:
+            return False
+        if piece == PAWN:
+            return move in self.generate_pseudo_legal_moves(from_mask, to_mask)
+        return bool(self.attacks_mask(from_square) & to_mask)
+
+    def is_into_check(self, move):
+        king = self.king(self.turn)
+        if king is None:
+            return False
+        checkers = self.attackers_mask(not self.turn, king)
+        if checkers and move not in self._generate_evasions(king, checkers, BB_SQUARES[move.from_square],
+                                                            BB_SQUARES[move.to_square]):
+            return True
+        return not self._is_safe(king, self._slider_blockers(king), move)
+
+    def is_legal(self, move):
+        return self.is_pseudo_legal(move) and not self.is_into_check(move)
+
+    # Kết thúc ván
+
+    def has_insufficient_material(self, color):
+        ours = self.occupied_co[color]
+        if ours & (self.pawns | self.rooks | self.queens):
+            return False
+        if ours & self.knights:
+            return popcount(ours) <= 2 and not (self.occupied_co[not color] & ~self.kings & ~self.queens)
+        if ours & self.bishops:
+            same_color = not self.bishops & chess.BB_DARK_SQUARES or not self.bishops & chess.BB_LIGHT_SQUARES
+            return same_color and not self.pawns and not self.knights
+        return True
+
+    def is_insufficient_material(self):
+        return self.has_insufficient_material(chess.WHITE) and self.has_insufficient_material(chess.BLACK)
+
+    def is_checkmate(self):
+        return self.is_check() and not any(self.generate_legal_moves())
+
+    def is_stalemate(self):
+        return not self.is_check() and not any(self.generate_legal_moves())
+
+    def is_game_over(self):
+        """Chiếu hết, hết nước, thiếu quân hoặc luật 75 nước (lặp lại thế cờ do tìm kiếm tự theo dõi)."""
+        return self.halfmove_clock >= 150 or self.is_insufficient_material() or not any(self.generate_legal_moves())
+
+    # Đi và lùi nước
+
+    def _toggle(self, piece_type, mask):
+        if piece_type == PAWN:
+            self.pawns ^= mask
+        elif piece_type == KNIGHT:
+            self.knights ^= mask
+        elif piece_type == BISHOP:
+            self.bishops ^= mask
+        elif piece_type == ROOK:
+            self.rooks ^= mask
+        elif piece_type == QUEEN:
+            self.queens ^= mask
+        else:
+            self.kings ^= mask
+
+    def push(self, move):
+        """Đi nước move (phải giả hợp lệ); trạng thái cũ được lưu để pop() khôi phục."""
+        from_square = move.from_square
+        to_square = move.to_square
+        turn = self.turn
+        mailbox = self.mailbox
+        occupied_co = self.occupied_co
+        piece_type = mailbox[from_square]
+        captured = mailbox[to_square]
+        self._stack.append((move, piece_type, captured, self.pawns, self.knights, self.bishops, self.rooks,
+                            self.queens, self.kings, occupied_co[0], occupied_co[1], self.castling_rights,
+                            self.ep_square, self.halfmove_clock))
+
+        ep_square = self.ep_square
+        self.ep_square = None
+        self.halfmove_clock += 1
+        if not turn:
+            self.fullmove_number += 1
+        from_bb = BB_SQUARES[from_square]
+        to_bb = BB_SQUARES[to_square]
+
+        castling_rights = self.castling_rights
+        if castling_rights:
+            castling_rights &= ~(from_bb | to_bb)
+            if piece_type == KING:
+                castling_rights &= ~(chess.BB_RANK_1 if turn else chess.BB_RANK_8)
+            elif captured == KING:
+                castling_rights &= ~(chess.BB_RANK_8 if turn else chess.BB_RANK_1)
+            self.castling_rights = castling_rights
+
+        if captured:
+            self._toggle(captured, to_bb)
+            occupied_co[not turn] ^= to_bb
+            self.halfmove_clock = 0
+        self._toggle(piece_type, from_bb)
+        new_type = move.promotion or piece_type
+        self._toggle(new_type, to_bb)
+        occupied_co[turn] ^= from_bb | to_bb
+        mailbox[from_square] = 0
+        mailbox[to_square] = new_type
+
+        if piece_type == PAWN:
+            self.halfmove_clock = 0
+            diff = to_square - from_square
+            if diff == 16 or diff == -16:
+                self.ep_square = from_square + diff // 2
+            elif to_square == ep_square and not captured and (diff == 7 or diff == 9 or diff == -7 or diff == -9):
+                capture_square = to_square - 8 if turn else to_square + 8
+                capture_bb = BB_SQUARES[capture_square]
+                self.pawns ^= capture_bb
+                occupied_co[not turn] ^= capture_bb
+                mailbox[capture_square] = 0
+        elif piece_type == KING and (to_square - from_square == 2 or from_square - to_square == 2):
+            if to_square > from_square:
+                rook_from, rook_to = from_square + 3, from_square + 1
+            else:
+                rook_from, rook_to = from_square - 4, from_square - 1
+            rook_bb = BB_SQUARES[rook_from] | BB_SQUARES[rook_to]
+            self.rooks ^= rook_bb
+            occupied_co[turn] ^= rook_bb
+            mailbox[rook_from] = 0
+            mailbox[rook_to] = ROOK
+
+        self.occupied = occupied_co[0] | occupied_co[1]
+        self.turn = not turn
+
+    def push_null(self):
+        """Bỏ lượt (null move cho tìm kiếm); không được gọi khi đang bị chiếu."""
+        occupied_co = self.occupied_co
+        self._stack.append((None, 0, 0, self.pawns, self.knights, self.bishops, self.rooks, self.queens,
+                            self.kings, occupied_co[0], occupied_co[1], self.castling_rights, self.ep_square,
+                            self.halfmove_clock))
+        self.ep_square = None
+        # Lặp lại thế cờ không được tính xuyên qua nước bỏ lượt
+        self.halfmove_clock = 0
+        if not self.turn:
+            self.fullmove_number += 1
+        self.turn = not self.turn
+
+    def pop(self):
+        (move, piece_type, captured, self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings,
+         black, white, self.castling_rights, self.ep_square, self.halfmove_clock) = self._stack.pop()
+        self.occupied_co[0] = black
+        self.occupied_co[1] = white
+        self.occupied = black | white
+        turn = self.turn = not self.turn
+        if not turn:
+            self.fullmove_number -= 1
+        if move is None:
+            return None
+
+        from_square = move.from_square
+        to_square = move.to_square
+        mailbox = self.mailbox
+        mailbox[from_square] = piece_type
+        mailbox[to_square] = captured
+        if piece_type == PAWN:
+            if to_square == self.ep_square and not captured and (from_square - to_square) % 8:
+                mailbox[to_square - 8 if turn else to_square + 8] = PAWN
+        elif piece_type == KING and (to_square - from_square == 2 or from_square - to_square == 2):
+            if to_square > from_square:
+                mailbox[from_square + 3], mailbox[from_square + 1] = ROOK, 0
+            else:
+                mailbox[from_square - 4], mailbox[from_square - 1] = ROOK, 0
+        return move
@@ -0,0 +1,215 @@
+"""
+    Tìm kiếm song song kiểu Lazy SMP trên nhiều tiến trình.
+    Mọi tiến trình dùng chung một bảng chuyển vị đặt trong multiprocessing.shared_memory.
+    Tiến trình chính tìm kiếm bình thường; các tiến trình phụ tìm cùng thế cờ với độ sâu
+    bắt đầu so le và chỉ có nhiệm vụ lấp đầy bảng chuyển vị cho tiến trình chính.
+
+    Benchmark thời gian đạt độ sâu:  python smp.py --depth 5 --threads 1 2 4 8
+"""
+import argparse
+import atexit
+import logging
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+
+import chess
+
+import minmax
+from timeman import TimeManager
+from transposition import GENERATION_MASK, TranspositionTable, table_size
+
+logger = logging.getLogger(__name__)
+
+CONTROL_SIZE = 8  # Byte 0 sau bảng chuyển vị: cờ dừng cho các tiến trình phụ
+HELPER_MAX_DEPTH = 32
+HELPER_STOP_TIMEOUT = 5.0  # Giây chờ tiến trình phụ còn sống trả số nút sau khi bật cờ dừng
+
+BENCH_FENS = [
+    chess.STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+
+class _HelperTimeManager(TimeManager):
+    """Tiến trình phụ không có giới hạn giờ riêng, chỉ dừng khi tiến trình chính bật cờ dừng."""
+
+    def __init__(self, control):
+        super().__init__()
+        self.control = control
+
+    def hard_expired(self, nodes=0):
+        return self.stopped or self.control[0] != 0
+
+    soft_expired = hard_expired
+
+
+def _helper_main(helper_id, shm_name, hash_mb, tasks, done):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    size = table_size(hash_mb)
+    table = TranspositionTable(hash_mb, buffer=shm.buf[:size])
+    engine = minmax.Engine(table=table)
+    control = shm.buf[size:size + CONTROL_SIZE]
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        board, margin, generation, new_game, options = task
+        if new_game:
+            # Bảng chuyển vị dùng chung đã được tiến trình chính xoá; tiến trình phụ không bao giờ ghi đè nó
+            engine.clear_heuristics()
+        engine.options.update(options)
+        # search() tự tăng thế hệ, nên đặt lùi một để khớp với tiến trình chính
+        table.generation = (generation - 1) & GENERATION_MASK
+        result = engine.search(board, HELPER_MAX_DEPTH, margin, manager=_HelperTimeManager(control),
+                               start_depth=1 + helper_id % 2)
+        done.put((helper_id, generation, result.nodes))
+    table.release()
+    control.release()
+    shm.close()
+
+
+class SearchPool:
+    """Nhóm threads - 1 tiến trình phụ sống suốt nhiều lần tìm kiếm, dùng chung bảng chuyển vị."""
+
+    def __init__(self, threads, hash_mb=None):
+        self.threads = threads
+        self.hash_mb = hash_mb or minmax.HASH_MB
+        size = table_size(self.hash_mb)
+        self.shm = shared_memory.SharedMemory(create=True, size=size + CONTROL_SIZE)
+        self.table = TranspositionTable(self.hash_mb, buffer=self.shm.buf[:size])
+        self.engine = minmax.Engine(table=self.table)
+        self.control = self.shm.buf[size:size + CONTROL_SIZE]
+        self.new_game = False  # Báo cho các tiến trình phụ xoá killer/history ở lần tìm kiếm tới
+
+        context = multiprocessing.get_context("spawn")
+        self.done = context.Queue()
+        self.helpers = []
+        for helper_id in range(1, threads):
+            tasks = context.Queue()
+            process = context.Process(target=_helper_main, daemon=True,
+                                      args=(helper_id, self.shm.name, self.hash_mb, tasks, self.done))
+            process.start()
+            self.helpers.append((process, tasks))
+
+    def search(self, board, max_depth=6, margin=minmax.ASPIRATION_WINDOW_MARGIN, movetime=None,
+               time_left=None, increment=0.0, moves_to_go=None, manager=None, on_iteration=None,
+               search_stats=None):
+        """Giống Engine.search; nodes trong kết quả là tổng số nút của mọi tiến trình."""
+        self.control[0] = 0
+        generation = (self.table.generation + 1) & GENERATION_MASK
+        for _, tasks in self.helpers:
+            tasks.put((board.copy(), margin, generation, self.new_game, dict(self.engine.options)))
+        self.new_game = False
+        try:
+            result = self.engine.search(board, max_depth, margin, movetime, time_left, increment, moves_to_go,
+                                        manager, on_iteration=on_iteration, search_stats=search_stats)
+        finally:
+            self.control[0] = 1
+            helper_nodes = self._collect_helper_nodes(generation)
+        return result._replace(nodes=result.nodes + helper_nodes)
+
+    def _collect_helper_nodes(self, generation):
+        """
+            Tổng số nút của các tiến trình phụ đã trả lời lần tìm kiếm này. Không chờ tiến trình phụ
+            đã chết (lỗi, bị hệ điều hành kill) và chờ tối đa HELPER_STOP_TIMEOUT giây; câu trả lời
+            muộn của lần tìm kiếm trước bị bỏ qua nhờ số thế hệ.
+        """
+        waiting = set(range(1, len(self.helpers) + 1))
+        nodes = 0
+        deadline = time.time() + HELPER_STOP_TIMEOUT
+        while waiting and time.time() < deadline:
+            try:
+                helper_id, helper_generation, helper_nodes = self.done.get(timeout=0.05)
+            except queue.Empty:
+                if not any(self.helpers[helper_id - 1][0].is_alive() for helper_id in waiting):
+                    break
+                continue
+            if helper_generation == generation and helper_id in waiting:
+                waiting.discard(helper_id)
+                nodes += helper_nodes
+        for helper_id in waiting:
+            process, _ = self.helpers[helper_id - 1]
+            if not process.is_alive():
+                logger.warning("Lazy SMP helper %d exited with code %s", helper_id, process.exitcode)
+        return nodes
+
+    def clear(self):
+        """Ván mới: xoá bảng chuyển vị dùng chung và killer/history của mọi tiến trình."""
+        self.engine.new_game()
+        self.new_game = True
+
+    def close(self):
+        for process, tasks in self.helpers:
+            tasks.put(None)
+        for process, _ in self.helpers:
+            process.join()
+        self.helpers = []
+        # Giải phóng mọi memoryview trỏ vào shared memory trước khi đóng
+        self.table.release()
+        self.control.release()
+        self.shm.close()
+        self.shm.unlink()
+
+
+_pool = None
+
+
+def get_pool(threads, hash_mb=None):
+    """SearchPool dùng chung cho get_best_move(threads=N); tạo lại khi đổi số luồng hoặc kích thước."""
+    global _pool
+    hash_mb = hash_mb or minmax.HASH_MB
+    if _pool is not None and (_pool.threads != threads or _pool.hash_mb != hash_mb):
+        _pool.close()
+        _pool = None
+    if _pool is None:
+        _pool = SearchPool(threads, hash_mb)
+    return _pool
+
+
+@atexit.register
+def _close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def time_to_depth(threads, depth, fens=BENCH_FENS, hash_mb=None):
+    """Tổng thời gian (giây) và tổng số nút để đạt độ sâu depth trên từng thế cờ."""
+    pool = SearchPool(threads, hash_mb)
+    total_time = 0.0
+    total_nodes = 0
+    try:
+        for fen in fens:
+            pool.clear()
+            start = time.time()
+            result = pool.search(chess.Board(fen), depth, movetime=3600)
+            total_time += time.time() - start
+            total_nodes += result.nodes
+    finally:
+        pool.close()
+    return total_time, total_nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lazy SMP time-to-depth benchmark")
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--hash", type=int, default=None, help="kích thước bảng chuyển vị (MB)")
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'threads':>7} {'time (s)':>9} {'speedup':>8} {'nodes':>10} {'nps':>8}")
+    for threads in args.threads:
+        elapsed, nodes = time_to_depth(threads, args.depth, hash_mb=args.hash)
+        baseline = baseline or elapsed
+        print(f"{threads:>7} {elapsed:>9.2f} {baseline / elapsed:>8.2f} {nodes:>10} {int(nodes / elapsed):>8}")
+
+
+if __name__ == "__main__":
+    main()
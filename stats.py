@@ -0,0 +1,53 @@
+import json
+
+
+class SearchStats:
+    """
+        Bộ đếm thống kê cho một lần tìm kiếm (chỉ bật khi truyền vào search/get_best_move).
+        trace: hàm tuỳ chọn trace(event, data) nhận các sự kiện 'iteration', 'cutoff' và
+        'tt_cutoff' của đúng lần tìm kiếm này, dùng để soi thứ tự nước đi và bảng chuyển vị.
+    """
+    __slots__ = ('nodes', 'qnodes', 'tt_probes', 'tt_hits', 'tt_cutoffs', 'beta_cutoffs',
+                 'first_move_cutoffs', 'killer_hits', 'history_hits', 'tb_hits', 'iterations', 'trace')
+
+    def __init__(self, trace=None):
+        self.trace = trace
+        self.reset()
+
+    def reset(self):
+        self.nodes = 0
+        self.qnodes = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.killer_hits = 0
+        self.history_hits = 0
+        self.tb_hits = 0
+        self.iterations = []  # Mỗi vòng lặp: depth, score, move, nodes, time (giây, cộng dồn)
+
+    def to_dict(self):
+        elapsed = self.iterations[-1]['time'] if self.iterations else 0.0
+        return {
+            'nodes': self.nodes,
+            'qnodes': self.qnodes,
+            'nps': int((self.nodes + self.qnodes) / elapsed) if elapsed > 0 else 0,
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'tt_hit_rate': self.tt_hits / self.tt_probes if self.tt_probes else 0.0,
+            'tt_cutoffs': self.tt_cutoffs,
+            'beta_cutoffs': self.beta_cutoffs,
+            'first_move_cutoffs': self.first_move_cutoffs,
+            'first_move_cutoff_rate': self.first_move_cutoffs / self.beta_cutoffs if self.beta_cutoffs else 0.0,
+            'killer_hits': self.killer_hits,
+            'history_hits': self.history_hits,
+            'tb_hits': self.tb_hits,
+            'iterations': self.iterations,
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def __repr__(self):
+        return f"SearchStats({self.to_dict()})"
@@ -0,0 +1,87 @@
+"""
+    Tra cứu bảng tàn cuộc Syzygy (file .rtbw/.rtbz cục bộ) qua chess.syzygy.
+    - WDL được tra trong negamax khi số quân không vượt quá giới hạn của bảng.
+    - DTZ được tra ở gốc để chọn ngay nước đi, không cần tìm kiếm.
+    Kết quả WDL được giữ trong bộ đệm LRU theo khoá Zobrist để tránh đọc lại đĩa.
+"""
+from collections import OrderedDict
+
+import chess
+import chess.syzygy
+
+CACHE_SIZE = 65536
+TB_WIN = 20000  # Thấp hơn INFINITY của minmax, cao hơn mọi điểm đánh giá tĩnh
+
+
+class Tablebase:
+    def __init__(self, paths, cache_size=CACHE_SIZE):
+        self.tables = chess.syzygy.Tablebase()
+        for path in paths.split(";") if isinstance(paths, str) else paths:
+            if path:
+                self.tables.add_directory(path)
+        # Tên bảng dạng "KQvK": số quân là số chữ cái trừ "v"
+        self.max_pieces = max((len(name) - 1 for name in self.tables.wdl), default=0)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.hits = 0
+        self.probes = 0
+
+    def close(self):
+        self.tables.close()
+        self.cache.clear()
+
+    def can_probe(self, board):
+        return (chess.popcount(board.occupied) <= self.max_pieces and not board.castling_rights
+                and board.king(chess.WHITE) is not None and board.king(chess.BLACK) is not None)
+
+    def probe_wdl(self, board, key):
+        """WDL (-2..2) theo góc nhìn bên đang đi, hoặc None nếu không có trong bảng (board: chess.Board hoặc Position)."""
+        if not self.can_probe(board):
+            return None
+        self.probes += 1
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        # Tìm kiếm truyền vào position.Position, còn chess.syzygy cần chess.Board
+        wdl = self.tables.get_wdl(board if isinstance(board, chess.Board) else board.to_board())
+        self.cache[key] = wdl
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return wdl
+
+    def probe_root(self, board):
+        """
+            Chọn nước đi ở gốc bằng DTZ: thắng thì về 0 nhanh nhất, thua thì kéo dài nhất.
+            Trả về (move, wdl) hoặc None nếu thế cờ không có trong bảng.
+        """
+        if not self.can_probe(board):
+            return None
+        best = None
+        for move in board.legal_moves:
+            board.push(move)
+            try:
+                if board.is_checkmate():
+                    rank, wdl = (3, 0), 2
+                else:
+                    child_wdl = self.tables.get_wdl(board)
+                    child_dtz = self.tables.get_dtz(board)
+                    if child_wdl is None or child_dtz is None:
+                        return None
+                    wdl = -child_wdl
+                    distance = abs(child_dtz)
+                    rank = (wdl, -distance if wdl > 0 else distance)
+            finally:
+                board.pop()
+            if best is None or rank > best[0]:
+                best = (rank, move, wdl)
+        return None if best is None else (best[1], best[2])
+
+
+def wdl_to_score(wdl, ply):
+    """Thắng/thua chắc chắn (kể cả luật 50 nước) gần gốc hơn thì điểm tuyệt đối lớn hơn."""
+    if wdl > 1:
+        return TB_WIN - ply
+    if wdl < -1:
+        return -TB_WIN + ply
+    return 0
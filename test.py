@@ -1,6 +1,35 @@
+import importlib.util
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
 import chess
+import chess.engine
+import chess.polyglot
 import pytest  # Giả sử bot của bạn có hàm này
+
+import batch
+import bench
+import minmax
+import perft
+from book import ENTRY, PolyglotBook
+from match import elo_estimate, run_match, sprt
 from minmax import get_best_move
+from position import Position
+from stats import SearchStats
+from tablebase import TB_WIN, Tablebase
+from transposition import BOUND_EXACT, BOUND_LOWER, TranspositionTable, decode_move, encode_move
+from worker import SearchWorker
+
+
+@pytest.fixture(autouse=True)
+def fresh_engine():
+    """Mỗi test là một ván mới, không dùng lại killer/history/bảng chuyển vị của test trước."""
+    minmax.new_game()
 
 
 # Test 1: Chiếu hết trong 1 nước
@@ -17,7 +46,9 @@ def test_checkmate_in_one(fen, best_move):
 
 # Test 2: Đòn chiến thuật Fork (Chĩa)
 @pytest.mark.parametrize("fen, best_move", [
-    ("8/8/2n5/8/4N3/8/4K3/8 w - - 0 1", "e4c5"),  # Mã chĩa vua và hậu
+    # Thế cờ cũ "8/8/2n5/8/4N3/8/4K3/8 w" (e4c5) không có vua đen, hậu đen và không có đòn chĩa nào:
+    # mọi nước chỉ hơn kém nhau vài điểm vị trí nên kết quả phụ thuộc thứ tự duyệt. Thay bằng đòn chĩa thật.
+    ("4k3/8/8/8/2q1N3/8/8/4K3 w - - 0 1", "e4d6"),  # Mã chĩa vua và hậu
     ("8/8/4q3/8/3N4/8/4K3/8 w - - 0 1", "d4e6"),  # Mã chĩa vua và xe
 ])
 def test_fork(fen, best_move):
@@ -70,4 +101,755 @@ def test_defensive_move(fen, best_move):
     move = get_best_move(board)
     assert move == chess.Move.from_uci(best_move)
 
+# Test 8: Đánh giá tăng dần phải khớp với tính lại toàn bộ bàn cờ
+@pytest.mark.parametrize("fen", [
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",  # Nhập thành, bắt tốt qua đường
+    "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1",  # Phong cấp
+])
+def test_incremental_eval(fen, monkeypatch):
+    monkeypatch.setattr(minmax, "EVAL_DEBUG", True)
+    board = chess.Board(fen)
+    get_best_move(board, 3)
+
+# Test 9: Bảng chuyển vị giới hạn kích thước, giữ ô sâu hơn và lưu nước đi tốt nhất
+def test_transposition_table_replacement():
+    table = TranspositionTable(hash_mb=1)
+    assert len(table) * 16 <= 1024 * 1024
+    move = chess.Move.from_uci("e7e8q")
+    key = 0x1234
+    collisions = [key + (table.mask + 1) * i for i in (1, 2)]  # Cùng bucket
+    table.store(key, -250, 6, BOUND_LOWER, encode_move(move))
+    table.store(collisions[0], 10, 2, BOUND_EXACT)
+    table.store(collisions[1], 20, 1, BOUND_EXACT)
+    assert table.probe(key) == (-250, 6, BOUND_LOWER, encode_move(move))
+    assert decode_move(table.probe(key)[3]) == move
+    assert table.probe(collisions[0]) is None
+    assert table.probe(collisions[1]) == (20, 1, BOUND_EXACT, 0)
+    # Sang lần tìm kiếm mới, ô cũ bị thay dù sâu hơn
+    table.new_search()
+    table.store(collisions[0], 30, 1, BOUND_EXACT)
+    assert table.probe(key) is None
+    assert table.probe(collisions[0]) == (30, 1, BOUND_EXACT, 0)
+
+# Test 10: Khoá Zobrist cập nhật tăng dần phải khớp với chess.polyglot.zobrist_hash
+@pytest.mark.parametrize("fen", [
+    chess.STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",  # Nhập thành
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",  # Bắt tốt qua đường
+    "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1",  # Phong cấp
+])
+def test_zobrist_incremental(fen):
+    rng = random.Random(fen)
+    for _ in range(20):
+        board = chess.Board(fen)
+        hash_key = minmax.zobrist_hash(board)
+        for _ in range(80):
+            assert hash_key == chess.polyglot.zobrist_hash(board)
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            move = rng.choice(moves)
+            hash_key = minmax.update_hash_key(board, move, hash_key)
+            board.push(move)
+
+# Test 11: Static Exchange Evaluation
+@pytest.mark.parametrize("fen, move, expected", [
+    ("1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1", "e1e5", 100),  # Tốt không được bảo vệ
+    ("1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1", "d3e5", -180),  # Mã đổi lấy tốt
+    ("4k3/8/2p5/3p4/4P3/8/8/4KR2 w - - 0 1", "e4d5", 0),  # Đổi tốt
+    ("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "e5d6", 100),  # Bắt tốt qua đường
+])
+def test_see(fen, move, expected):
+    assert minmax.see(chess.Board(fen), chess.Move.from_uci(move)) == expected
+
+# Test 12: Hết giờ giữa vòng lặp vẫn trả về nước đi hợp lệ đúng hạn và không làm hỏng bàn cờ
+@pytest.mark.parametrize("movetime", [0.05, 0.3])
+def test_movetime_abort(movetime):
+    fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    board = chess.Board(fen)
+    start = time.time()
+    move = get_best_move(board, 50, movetime=movetime)
+    assert time.time() - start < movetime + 0.2
+    assert move in board.legal_moves
+    assert board.fen() == fen and not board.move_stack
+
+# Test 13: Tìm kiếm song song (Lazy SMP) trả về nước đi hợp lệ và dùng chung bảng chuyển vị
+def test_parallel_search():
+    from smp import SearchPool
+    pool = SearchPool(threads=2, hash_mb=1)
+    try:
+        board = chess.Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        result = pool.search(board, 3)
+        assert result.move in board.legal_moves
+        assert result.depth == 3
+        assert pool.table.hashfull() > 0
+        # Tiến trình phụ chết giữa chừng: tìm kiếm vẫn kết thúc và chỉ cộng số nút của tiến trình còn sống
+        process, _ = pool.helpers[0]
+        process.kill()
+        process.join()
+        start = time.time()
+        result = pool.search(board, 2)
+        assert result.move in board.legal_moves and time.time() - start < 2
+    finally:
+        pool.close()
+
+# Test 14: Giao tiếp UCI chạy được dưới chess.engine
+def test_uci_engine():
+    engine = chess.engine.SimpleEngine.popen_uci([sys.executable, "uci.py"],
+                                                 cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        engine.configure({"Hash": 4})
+        board = chess.Board("8/8/4q3/8/3N4/8/4K3/8 w - - 0 1")
+        result = engine.play(board, chess.engine.Limit(depth=3), info=chess.engine.INFO_ALL)
+        assert result.move == chess.Move.from_uci("d4e6")
+        assert result.info["depth"] == 3 and result.info["nodes"] > 0
+        assert result.info["pv"][0] == result.move
+        result = engine.play(chess.Board(), chess.engine.Limit(time=0.2))
+        assert result.move in chess.Board().legal_moves
+    finally:
+        engine.quit()
+
+# Test 15: Thống kê tìm kiếm và hook trace
+def test_search_stats():
+    events = []
+    stats = SearchStats(trace=lambda event, data: events.append(event))
+    board = chess.Board("r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3")
+    get_best_move(board, 4, stats=stats)
+    data = json.loads(stats.to_json())
+    assert data["nodes"] > 0 and data["qnodes"] > 0
+    assert 0 < data["tt_hits"] <= data["tt_probes"]
+    assert data["first_move_cutoffs"] <= data["beta_cutoffs"]
+    assert [iteration["depth"] for iteration in data["iterations"]] == [1, 2, 3, 4]
+    assert events.count("iteration") == 4 and "cutoff" in events
+
+# Test 16: bench tất định: chạy lại cho cùng số nút và cùng signature
+def test_bench_deterministic():
+    fens = bench.TEST_FENS[:3] + bench.STANDARD_FENS[:2]
+    first = bench.run_bench(3, fens)
+    second = bench.run_bench(3, fens)
+    assert first["nodes"] == second["nodes"] > 0
+    assert first["signature"] == second["signature"]
+    # bench.TEST_FENS phải là đúng các thế cờ chiến thuật ở Test 1-7
+    tactics = [fen for name in ("test_checkmate_in_one", "test_fork", "test_pin", "test_endgame", "test_skewer",
+                                "test_sacrifice", "test_defensive_move")
+               for mark in globals()[name].pytestmark for fen, _ in mark.args[1]]
+    assert bench.TEST_FENS == tactics
+
+# Test 17: Microbenchmark (cần pytest-benchmark): python -m pytest test.py -k micro --benchmark-only
+HAS_BENCHMARK = importlib.util.find_spec("pytest_benchmark") is not None
+MICRO_BOARD = chess.Board("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10")
+
+@pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark chưa được cài")
+def test_micro_evaluate_board(benchmark):
+    benchmark(minmax.evaluate_board, MICRO_BOARD)
+
+@pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark chưa được cài")
+def test_micro_zobrist_hash(benchmark):
+    assert benchmark(minmax.zobrist_hash, MICRO_BOARD) == chess.polyglot.zobrist_hash(MICRO_BOARD)
+
+@pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark chưa được cài")
+def test_micro_update_hash_key(benchmark):
+    key = minmax.zobrist_hash(MICRO_BOARD)
+    moves = list(MICRO_BOARD.legal_moves)
+    benchmark(lambda: [minmax.update_hash_key(MICRO_BOARD, move, key) for move in moves])
+
+@pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark chưa được cài")
+def test_micro_move_ordering(benchmark):
+    engine = minmax.Engine()
+    position = Position.from_board(MICRO_BOARD)
+    benchmark(lambda: list(engine.pick_moves(position, 4, None)))
+
+@pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark chưa được cài")
+def test_micro_make_unmake(benchmark):
+    position = Position.from_board(MICRO_BOARD)
+    moves = position.legal_moves
+
+    def make_unmake():
+        for move in moves:
+            position.push(move)
+            position.pop()
+
+    benchmark(make_unmake)
+
+# Test 18: Sách khai cuộc Polyglot: tìm đúng thế cờ, chọn theo trọng số, đổi nước nhập thành
+def write_book(path, entries):
+    rows = []
+    for fen, uci_move, weight in entries:
+        board = chess.Board(fen)
+        move = chess.Move.from_uci(uci_move)
+        raw = move.to_square | move.from_square << 6 | (move.promotion - 1 if move.promotion else 0) << 12
+        rows.append((chess.polyglot.zobrist_hash(board), raw, weight))
+    with open(path, "wb") as f:
+        for key, raw, weight in sorted(rows):
+            f.write(ENTRY.pack(key, raw, weight, 0))
+
+def test_polyglot_book(tmp_path):
+    castle_fen = "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"
+    path = tmp_path / "book.bin"
+    write_book(path, [(chess.STARTING_FEN, "e2e4", 100), (chess.STARTING_FEN, "d2d4", 1),
+                      (chess.STARTING_FEN, "e2e5", 500), (castle_fen, "e1h1", 1),
+                      ("8/8/8/8/8/4k3/5P2/4K3 w - - 0 1", "f2f3", 1)])
+    with PolyglotBook(path, randomness=0) as book:
+        assert len(book) == 5
+        board = chess.Board()
+        assert sorted(move.uci() for move, _ in book.moves(board)) == ["d2d4", "e2e4"]  # e2e5 không hợp lệ
+        assert book.choose(board) == chess.Move.from_uci("e2e4")
+        assert book.choose(chess.Board(castle_fen)) == chess.Move.from_uci("e1g1")
+        board.push_uci("e2e4")
+        assert book.choose(board) is None
+        start = time.time()
+        assert get_best_move(chess.Board(), book=book) == chess.Move.from_uci("e2e4")
+        assert time.time() - start < 0.1
+    with PolyglotBook(path, randomness=1.0, rng=random.Random(1)) as book:
+        picks = {book.choose(chess.Board()).uci() for _ in range(200)}
+        assert picks == {"e2e4", "d2d4"}
+
+# Test 19: Bảng tàn cuộc Syzygy: bộ đệm LRU, chọn nước ở gốc bằng DTZ, tra WDL trong tìm kiếm
+class FakeTables:
+    """Thay cho file .rtbw/.rtbz: bên trắng luôn thắng, DTZ ngắn hơn khi vua đen bị chiếu."""
+    def __init__(self):
+        self.calls = 0
+
+    def get_wdl(self, board):
+        self.calls += 1
+        return 2 if board.turn == chess.WHITE else -2
+
+    def get_dtz(self, board):
+        sign = 1 if board.turn == chess.WHITE else -1
+        return sign * (1 if board.is_check() else 10)
+
+    def close(self):
+        pass
+
+def test_tablebase(tmp_path):
+    tb = Tablebase([str(tmp_path)], cache_size=2)
+    assert tb.max_pieces == 0
+    tb.tables, tb.max_pieces = FakeTables(), 3
+    board = chess.Board("8/8/8/4k3/8/8/8/KQ6 w - - 0 1")
+    key = chess.polyglot.zobrist_hash(board)
+    assert tb.probe_wdl(board, key) == 2 and tb.probe_wdl(board, key) == 2
+    assert tb.tables.calls == 1 and tb.hits == 1
+    for fen in ["8/8/8/3k4/8/8/8/KQ6 w - - 0 1", "8/8/8/2k5/8/8/8/KQ6 w - - 0 1"]:
+        tb.probe_wdl(chess.Board(fen), chess.polyglot.zobrist_hash(chess.Board(fen)))
+    assert key not in tb.cache and len(tb.cache) == 2
+    assert tb.probe_wdl(chess.Board(), minmax.zobrist_hash(chess.Board())) is None
+
+    move, wdl = tb.probe_root(board)
+    assert wdl == 2 and board.gives_check(move)
+    stats = SearchStats()
+    try:
+        minmax.set_tablebase(tb)
+        result = minmax.search(board, 4)
+        assert result.move == move and result.nodes == 0
+        board = chess.Board("8/8/8/4k3/8/8/1r6/KQ6 w - - 0 1")
+        result = minmax.search(board, 2, search_stats=stats)
+        assert board.is_capture(result.move) and result.score == TB_WIN - 1 and stats.tb_hits > 0
+    finally:
+        minmax.set_tablebase(None)
+
+# Test 20: Elo kèm sai số, SPRT và trận đấu song song với chính uci.py làm đối thủ
+def test_elo_and_sprt():
+    assert elo_estimate(10, 10, 10)[0] == 0.0
+    elo, margin = elo_estimate(60, 20, 20)
+    assert elo == pytest.approx(147.2, abs=0.1) and 0 < margin < elo
+    assert elo_estimate(20, 20, 60)[0] == pytest.approx(-elo)
+    assert elo_estimate(600, 200, 200)[1] < margin  # Nhiều ván hơn thì sai số nhỏ hơn
+    assert sprt(60, 20, 20, 0, 10)[3] is None and sprt(600, 200, 200, 0, 10)[3] == 'H1'
+    assert sprt(200, 200, 600, 0, 10)[3] == 'H0'
+    assert sprt(3, 2, 3, 0, 10)[3] is None
+
+def test_match_runner(tmp_path):
+    pgn_path = tmp_path / "games.pgn"
+    result = run_match([sys.executable, os.path.join(os.path.dirname(__file__), "uci.py")], games=2,
+                       concurrency=1, depth=1, opponent_depth=1, max_plies=12, pgn_path=str(pgn_path))
+    assert result["wins"] + result["draws"] + result["losses"] == 2
+    games = pgn_path.read_text().count("[Event ")
+    assert games == 2
+
+# Test 21: Tìm kiếm nền cho giao diện: không chặn luồng gọi, huỷ được, ponder dùng lại công việc
+def wait_for_result(worker, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        result = worker.take_result()
+        if result is not None:
+            return result
+        time.sleep(0.01)
+    raise AssertionError("search did not finish")
+
+def test_search_worker():
+    worker = SearchWorker(max_depth=3)
+    board = chess.Board()
+    worker.start(board)
+    result = wait_for_result(worker)
+    assert result.move in board.legal_moves and worker.info is not None
+
+    board.push(result.move)
+    worker.ponder(board, result.pv[1])
+    time.sleep(0.2)
+    assert worker.pondering and worker.take_result() is None
+    board.push(result.pv[1])
+    worker.opponent_moved(board, result.pv[1])  # ponderhit: tiếp tục tìm kiếm đang chạy
+    assert wait_for_result(worker).move in board.legal_moves
+
+    worker.max_depth = minmax.MAX_PLY
+    worker.ponder(board, next(iter(board.legal_moves)))
+    other = list(board.legal_moves)[-1]
+    board.push(other)
+    worker.opponent_moved(board, other)  # Đoán sai: huỷ và tìm lại cho thế cờ thật
+    assert worker.busy and not worker.pondering
+    start = time.time()
+    worker.cancel()
+    assert time.time() - start < 1.0 and not worker.busy
+
+# Test 22: Engine chạy không cần pygame và cho kết quả giống hệt nhau giữa các lần chạy
+def test_headless_deterministic():
+    script = ("import sys, cli; cli.analyse('r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3', 4); "
+              "print('pygame' in sys.modules)")
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    runs = [subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True, text=True, check=True).stdout
+            for _ in range(2)]
+    assert runs[0] == runs[1] and runs[0].endswith("False\n")
+    board = chess.Board()
+    first = minmax.search(board, 4)
+    minmax.new_game()
+    second = minmax.search(board, 4)
+    assert (first.move, first.score, first.pv, first.nodes) == (second.move, second.score, second.pv, second.nodes)
+
+# Test 23: Nhiều Engine độc lập tìm kiếm đồng thời; killer/history được xoá và làm cũ có quy tắc
+def test_engine_instances():
+    fens = ["r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"]
+    expected = [minmax.Engine(hash_mb=1).search(chess.Board(fen), 4) for fen in fens]
+    engines = [minmax.Engine(hash_mb=1) for _ in fens]
+    results = [None] * len(fens)
+
+    def run(i):
+        results[i] = engines[i].search(chess.Board(fens[i]), 4)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(fens))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for result, reference in zip(results, expected):
+        assert (result.move, result.score, result.nodes) == (reference.move, reference.score, reference.nodes)
+
+    engine = engines[1]
+    assert any(engine.killers[ply][0] for ply in range(1, 4))
+    # Nước ăn quân không bao giờ thành killer, kể cả khi gọi thẳng _update_quiet_cutoff
+    board = Position(fens[1])
+    killers = [list(killers) for killers in engine.killers]
+    engine._update_quiet_cutoff(board, chess.Move.from_uci("e2a6"), 4, 1)
+    assert engine.killers == killers
+    stored = []
+    update = engine._update_quiet_cutoff
+
+    def record(board, move, depth, ply):
+        update(board, move, depth, ply)
+        if engine.killers[ply][0] == move:
+            stored.append((board.fen(), move))
+
+    engine._update_quiet_cutoff = record
+    engine.search(chess.Board(fens[1]), 5)
+    del engine._update_quiet_cutoff
+    assert stored and not any(chess.Board(fen).is_capture(move) for fen, move in stored)
+    history = [value for table in engine.history for value in table]
+    engine._new_search()
+    assert not any(killer for killers in engine.killers for killer in killers)
+    assert [value for table in engine.history for value in table] == [value >> 1 for value in history]
+    # clear_heuristics (tiến trình phụ của Lazy SMP dùng khi sang ván mới) không động tới bảng chuyển vị
+    engine.search(chess.Board(fens[1]), 3)
+    root_key = minmax.zobrist_hash(chess.Board(fens[1]))
+    entry = engine.transposition_table.probe(root_key)
+    engine.clear_heuristics()
+    assert not any(value for table in engine.history for value in table)
+    assert not any(killer for killers in engine.killers for killer in killers)
+    assert entry is not None and engine.transposition_table.probe(root_key) == entry
+    engine.new_game()
+    assert not any(value for table in engine.history for value in table)
+    assert engine.transposition_table.probe(root_key) is None
+    with pytest.raises(ValueError):
+        minmax.Engine(no_such_option=True)
+
+# Test 24: Phân tích hàng loạt: giữ thứ tự đầu vào, đọc được EPD/PGN và resume sau khi bị ngắt
+def test_batch_analysis(tmp_path):
+    epd = tmp_path / "positions.epd"
+    epd.write_text("r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - id \"italian\";\n"
+                   "# chú thích\n"
+                   "8/8/8/4k3/8/8/4P3/4K3 w - - 0 1\n"
+                   "6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - id \"mate\";\n")
+    pgn = tmp_path / "game.pgn"
+    pgn.write_text('[Event "?"]\n\n1. e4 e5 2. Nf3 *\n')
+    assert [position_id for _, position_id, _ in batch.read_positions(str(pgn))] == \
+        ["game1:ply0", "game1:ply1", "game1:ply2", "game1:ply3"]
+
+    output = tmp_path / "results.jsonl"
+    assert batch.analyse_file(str(epd), str(output), depth=2, workers=1) == 3
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [row['index'] for row in rows] == [0, 1, 2]
+    assert [row['id'] for row in rows] == ["italian", "1", "mate"]
+    assert all(chess.Move.from_uci(row['bestmove']) in chess.Board(row['fen']).legal_moves for row in rows)
+    assert rows[2]['pv'][0] == rows[2]['bestmove']
+    assert all(row['depth'] == 2 and row['nodes'] > 0 for row in rows)
+
+    # Kết quả một thế cờ không phụ thuộc các thế cờ mà cùng tiến trình đã phân tích trước đó
+    settings = {'depth': 4, 'movetime': None, 'hash_mb': 1}
+    tasks = list(batch.read_positions(str(epd)))
+    warm = minmax.Engine(hash_mb=1)
+    forward = [batch.analyse_position(task, warm, settings) for task in tasks]
+    backward = [batch.analyse_position(task, warm, settings) for task in reversed(tasks)][::-1]
+    fresh = [batch.analyse_position(task, minmax.Engine(hash_mb=1), settings) for task in tasks]
+    for rows_a, rows_b in ((forward, fresh), (backward, fresh)):
+        assert [(row['bestmove'], row['score'], row['nodes'], row['pv']) for row in rows_a] == \
+            [(row['bestmove'], row['score'], row['nodes'], row['pv']) for row in rows_b]
+
+    # Bị ngắt sau dòng đầu tiên, dòng thứ hai ghi dở: resume chỉ phân tích phần còn lại
+    lines = output.read_text().splitlines(keepends=True)
+    output.write_text(lines[0] + lines[1][:20])
+    assert batch.analyse_file(str(epd), str(output), depth=2, workers=1, ordered=False, resume=True) == 2
+    resumed = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(row['index'] for row in resumed) == [0, 1, 2]
+
+
+# Test 25: Texel tuning: đặc trưng khớp với evaluate_board, tune giảm sai số và engine nạp được bảng mới
+def test_texel_tuning(tmp_path):
+    np = pytest.importorskip("numpy")
+    import texel
+
+    rng = random.Random(7)
+    lines = []
+    for _ in range(200):
+        board = chess.Board()
+        for _ in range(rng.randint(6, 60)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        # Nhãn sinh từ một hàm đánh giá "thật" coi mã đáng giá hơn 150 điểm
+        knights = len(board.pieces(chess.KNIGHT, chess.WHITE)) - len(board.pieces(chess.KNIGHT, chess.BLACK))
+        true_score = minmax.evaluate_board(board) + 150 * knights
+        lines.append(f"{board.epd()} [{1 / (1 + 10 ** (-true_score / 400)):.4f}]")
+    data = tmp_path / "labelled.epd"
+    data.write_text("\n".join(lines) + "\n")
+
+    bitboards, results = texel.load_dataset(str(data))
+    assert len(results) == 200
+    indices, signs = texel.sparse_features(bitboards)
+    weights = texel.weights_from_engine()
+    boards = [texel.parse_labelled(line)[0] for line in lines]
+    assert np.allclose(texel.evaluate(indices, signs, weights), [minmax.evaluate_board(b) for b in boards])
+
+    results = results.astype(np.float64)
+    before = texel.loss(indices, signs, results, weights, 1.0)
+    tuned, k, after = texel.tune(indices, signs, results, weights, k=1.0, epochs=100)
+    assert after < before
+    assert tuned[1].mean() > weights[1].mean()  # Mã được tăng giá trị
+
+    saved = minmax.eval_params()
+    try:
+        params = texel.params_from_weights(tuned)
+        path = tmp_path / "eval_params.json"
+        path.write_text(json.dumps(params))
+        minmax.load_eval_params(str(path))
+        assert minmax.piece_score[chess.KNIGHT] == params['piece_score']['2']
+        assert all(abs(minmax.evaluate_board(b) - score) <= 64 for b, score in
+                   zip(boards, texel.evaluate(indices, signs, tuned)))
+    finally:
+        minmax.set_eval_params(saved)
+    assert minmax.eval_params() == saved
+
+
+# Test 26: Position sinh nước đi giống hệt chess.Board (cả thứ tự), push/pop khôi phục đúng trạng thái
+POSITION_FENS = [chess.STARTING_FEN,
+                 "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                 "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                 "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                 "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8"]
+
+def test_position_matches_board():
+    rng = random.Random(3)
+    for game in range(60):
+        board = chess.Board(rng.choice(POSITION_FENS))
+        position = Position.from_board(board)
+        for _ in range(rng.randint(1, 80)):
+            moves = list(board.legal_moves)
+            assert list(position.generate_legal_moves()) == moves
+            assert list(position.generate_legal_captures()) == list(board.generate_legal_captures())
+            assert position.is_check() == board.is_check()
+            assert position.is_game_over() == board.is_game_over()
+            if not moves:
+                break
+            for move in moves[:5]:
+                assert position.gives_check(move) == board.gives_check(move)
+            move = rng.choice(moves)
+            fen = position.fen()
+            position.push(move)
+            position.pop()
+            assert position.fen() == fen
+            board.push(move)
+            position.push(move)
+            assert position.fen() == board.fen()
+            assert all(position.piece_type_at(square) == (board.piece_type_at(square) or 0)
+                       for square in chess.SQUARES)
+        assert position.to_board().fen() == board.fen()
+
+    # Không có vua: mọi nước giả hợp lệ đều được sinh ra
+    kingless = Position("8/8/8/3q4/8/8/8/R7 w - - 0 1")
+    assert len(kingless.legal_moves) == 14
+    assert chess.Move.from_uci("a1a8") in kingless.legal_moves
+
+
+# Test 27: Perft khớp với số nút chuẩn (nhập thành, bắt tốt qua đường, phong cấp), kể cả khi dùng bảng băm và nhiều tiến trình
+def test_perft():
+    results = perft.run_suite(max_nodes=10000, verbose=False)
+    assert len(results) >= len(perft.SUITE) * 2
+    assert all(nodes == expected for _, _, nodes, expected, _ in results)
+
+    fen, expected = perft.SUITE[1]
+    position = Position(fen)
+    assert perft.perft(position, 3, perft.PerftTable(1)) == expected[2]
+    assert position.fen() == chess.Board(fen).fen()
+    split = perft.divide(position, 3, workers=2, hash_mb=1)
+    assert split == perft.divide(position, 3)
+    assert [move for move, _ in split] == list(chess.Board(fen).legal_moves)
+    assert sum(count for _, count in split) == expected[2]
+
+
+# Test 28: Chiếu hết / hết nước nhận ra từ bộ chọn nước, lặp lại thế cờ theo lịch sử ván, contempt và "score mate"
+def test_terminal_and_repetition():
+    engine = minmax.Engine(hash_mb=1)
+    engine._new_search()
+    for fen, expected in [("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", 0),  # Hết nước dù thua quân
+                          ("5Q1k/8/6K1/8/8/8/8/8 b - - 0 1", -minmax.MATE_SCORE + 1)]:  # Bị chiếu hết
+        position = Position(fen)
+        key = minmax.zobrist_hash(position)
+        assert engine.negamax(position, 2, -minmax.INFINITY, minmax.INFINITY, key, minmax.EvalState(position),
+                              1) == expected
+
+    result = minmax.Engine(hash_mb=1).search(chess.Board("7k/8/6K1/8/8/8/8/5Q2 w - - 0 1"), 4)
+    assert result.move == chess.Move.from_uci("f1f8") and result.score == minmax.MATE_SCORE - 1
+    assert minmax.format_score(result.score) == "mate 1"
+    assert minmax.mate_in(-minmax.MATE_SCORE + 4) == -2 and minmax.mate_in(300) is None
+
+    # Nf3 lặp lại thế cờ đã có trong ván; engine thích hoà (contempt âm) sẽ chọn ngay
+    board = chess.Board()
+    for uci_move in ("g1f3", "g8f6", "f3g1", "f6g8"):
+        board.push_uci(uci_move)
+    result = minmax.Engine(hash_mb=1, contempt=-500).search(board, 3)
+    assert result.move == chess.Move.from_uci("g1f3") and result.score == 500
+    assert minmax.Engine(hash_mb=1, contempt=-500).search(chess.Board(), 3).score < 500
+    # Với threads > 1, tuỳ chọn của engine truyền vào được dùng cho nhóm tiến trình
+    from smp import get_pool
+    assert get_best_move(board, 3, threads=2, engine=minmax.Engine(hash_mb=1, contempt=-500)) == \
+        chess.Move.from_uci("g1f3")
+    assert get_pool(2).engine.options['contempt'] == -500
+    get_best_move(board, 1, threads=2)
+    assert get_pool(2).engine.options['contempt'] == 0
+
+    engine = chess.engine.SimpleEngine.popen_uci([sys.executable, "uci.py"],
+                                                 cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        info = engine.analyse(chess.Board("7k/8/6K1/8/8/8/8/5Q2 w - - 0 1"), chess.engine.Limit(depth=3))
+        assert info["score"].white().mate() == 1
+    finally:
+        engine.quit()
+
+
+# Test 29: Null move trên Position và khoá Zobrist; cắt tỉa chọn lọc giảm số nút, tắt được bằng tuỳ chọn
+def test_selective_pruning():
+    fen = "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3"
+    position = Position(fen)
+    key = minmax.update_hash_key_null(position, minmax.zobrist_hash(position))
+    position.push_null()
+    assert position.turn == chess.BLACK and position.ep_square is None
+    assert minmax.zobrist_hash(position) == key
+    assert position.pop() is None and position.fen() == fen
+
+    fens = bench.STANDARD_FENS[:4]
+    disabled = {name: False for name in ("null_move", "reverse_futility", "futility", "razoring")}
+    pruned = bench.run_bench(4, fens)
+    plain = bench.run_bench(4, fens, options=disabled)
+    assert pruned['nodes'] < plain['nodes']
+    with pytest.raises(ValueError):
+        minmax.Engine(null_moves=False)
+
+
+# Test 30: Bộ chọn nước theo giai đoạn: nước bảng chuyển vị, ăn quân SEE >= 0, killer, nước im lặng,
+# ăn quân bị lỗ; sinh đúng tập nước hợp lệ, không trùng
+@pytest.mark.parametrize("tt_move", ["e1g1", "e5f7", None])
+def test_pick_moves_stages(tt_move):
+    board = Position("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    engine = minmax.Engine(hash_mb=1)
+    engine.killers[2] = [chess.Move.from_uci("a2a3"), chess.Move.from_uci("e2a6")]  # Killer ăn quân bị bỏ qua
+    tt_move = chess.Move.from_uci(tt_move) if tt_move else None
+    picked = list(engine.pick_moves(board, 2, tt_move))
+    moves = [move for _, move in picked]
+    assert len(moves) == len(set(moves)) and set(moves) == set(board.generate_legal_moves())
+
+    stages = [stage for stage, _ in picked]
+    assert stages == sorted(stages)
+    if tt_move is not None:
+        assert picked[0] == (minmax.STAGE_TT, tt_move) and stages.count(minmax.STAGE_TT) == 1
+    assert [move for stage, move in picked if stage == minmax.STAGE_KILLER] == [chess.Move.from_uci("a2a3")]
+    good = [minmax.see(board, move) for stage, move in picked if stage == minmax.STAGE_GOOD_CAPTURE]
+    assert good and min(good) >= 0 and good == sorted(good, reverse=True)
+    bad = [move for stage, move in picked if stage == minmax.STAGE_BAD_CAPTURE]
+    assert bad and all(minmax.see(board, move) < 0 for move in bad)
+    for stage, move in picked:
+        is_capture = board.is_capture(move) or move.promotion is not None
+        assert is_capture == (stage in (minmax.STAGE_GOOD_CAPTURE, minmax.STAGE_BAD_CAPTURE)) \
+            or stage == minmax.STAGE_TT
+
+
+# Test 31: Killer và history chỉ nhận nước im lặng, kể cả khi nước gây cutoff là nước ăn quân từ bảng chuyển vị
+def test_killers_and_history_quiet_only():
+    recorded = []
+
+    class RecordingEngine(minmax.Engine):
+        def _update_quiet_cutoff(self, board, move, depth, ply):
+            recorded.append(board.is_capture(move) or move.promotion is not None)
+            super()._update_quiet_cutoff(board, move, depth, ply)
+
+    for fen in ["r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"]:
+        RecordingEngine(hash_mb=1).search(chess.Board(fen), 5)
+    assert recorded and not any(recorded)
+
+
+# Test 32: Chiếu hết sau 2 nước bằng một nước im lặng xếp cuối; cách cắt top_k cũ bỏ sót nước này ở độ sâu 4
+def test_quiet_mate_not_pruned():
+    board = chess.Board("3rkbr1/3ppp1p/n1p5/8/7p/q7/8/5K2 b - - 11 30")
+    result = minmax.Engine(hash_mb=1).search(board, 4)
+    assert result.move == chess.Move.from_uci("a3b2") and minmax.mate_in(result.score) == 2
+
+
+# Test 33: Lệnh go/setoption/position sai không làm hỏng vòng lặp UCI; tìm kiếm lỗi vẫn trả bestmove;
+# ucinewgame xoá cả nhóm tiến trình Lazy SMP
+def test_uci_go_parsing(monkeypatch):
+    import io
+    import uci
+
+    output = io.StringIO()
+    engine = uci.UciEngine(output)
+    engine.handle("position startpos moves e2e4")
+    engine.handle("go searchmoves e7e5 c7c5 depth 2 wtime abc")
+    engine.search_thread.join()
+    assert output.getvalue().splitlines()[-1].startswith("bestmove ")
+
+    # setoption / position sai không làm dừng vòng lặp: bỏ qua giá trị lạ, dừng ở nước đi không hợp lệ
+    assert engine.handle("setoption name Hash value lots") and engine.hash_mb == minmax.HASH_MB
+    assert engine.handle("setoption name BookFile value /no/such/book.bin") and engine.book is None
+    assert engine.handle("position fen not a fen") and engine.board == chess.Board("rnbqkbnr/pppppppp/8/8/4P3/8/"
+                                                                                   "PPPP1PPP/RNBQKBNR b KQkq - 0 1")
+    assert engine.handle("position startpos moves e2e4 e7e5 e1e3 g8f6")
+    assert [move.uci() for move in engine.board.move_stack] == ["e2e4", "e7e5"]
+    assert "info string" in output.getvalue()
+
+    # ucinewgame với Threads > 1 xoá cả bảng chuyển vị của nhóm tiến trình
+    from smp import get_pool
+    engine.handle("setoption name Threads value 2")
+    engine.handle("go depth 3")
+    engine.search_thread.join()
+    pool = get_pool(2, engine.hash_mb)
+    key = minmax.zobrist_hash(engine.board)
+    assert pool.table.probe(key) is not None
+    engine.handle("ucinewgame")
+    assert pool.table.probe(key) is None
+    engine.handle("setoption name Threads value 1")
+
+    def broken_search(*args, **kwargs):
+        raise RuntimeError("search failed")
+
+    errors = []
+    monkeypatch.setattr(engine.engine, "search", broken_search)
+    monkeypatch.setattr(threading, "excepthook", errors.append)
+    engine.handle("go depth 3")
+    engine.search_thread.join()
+    bestmove = output.getvalue().splitlines()[-1].split()
+    assert bestmove[0] == "bestmove" and chess.Move.from_uci(bestmove[1]) in engine.board.legal_moves
+    assert len(errors) == 1 and errors[0].exc_type is RuntimeError
+    assert engine.handle("isready") and output.getvalue().splitlines()[-1] == "readyok"
+
+
+# Test 34: Negamax PVS (bảng chuyển vị, thứ tự nước, aspiration) chọn cùng nước và cùng điểm với alpha-beta
+# thuần ở cùng độ sâu (cùng quiescence ở lá, không cắt tỉa chọn lọc) nhưng duyệt ít nút hơn
+def alpha_beta_reference(fen, depth):
+    """Alpha-beta toàn cửa sổ, nước đi theo thứ tự sinh, không bảng chuyển vị; trả về (nước, điểm, số nút)."""
+    board = Position(fen)
+    engine = minmax.Engine(hash_mb=1)
+    engine._new_search()
+    eval_state = minmax.EvalState(board)
+    nodes = 0
+
+    def alpha_beta(depth, alpha, beta, ply):
+        nonlocal nodes
+        if depth == 0:
+            return engine.quiescence(board, alpha, beta, eval_state, ply)
+        nodes += 1
+        best = -minmax.INFINITY
+        for move in list(board.generate_legal_moves()):
+            eval_state.push(board, move)
+            board.push(move)
+            best = max(best, -alpha_beta(depth - 1, -beta, -max(alpha, best), ply + 1))
+            board.pop()
+            eval_state.pop()
+            if best >= beta:
+                break
+        if best == -minmax.INFINITY:
+            return -minmax.MATE_SCORE + ply if board.is_check() else 0
+        return best
+
+    best_move, best_score = None, -minmax.INFINITY
+    for move in list(board.generate_legal_moves()):
+        eval_state.push(board, move)
+        board.push(move)
+        score = -alpha_beta(depth - 1, -minmax.INFINITY, -best_score, 1)
+        board.pop()
+        eval_state.pop()
+        if score > best_score:
+            best_move, best_score = move, score
+    return best_move, best_score, nodes + engine.node_count
+
+
+@pytest.mark.parametrize("fen", [
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "4k3/p7/4q3/8/3N4/8/P3K3/8 w - - 0 1",  # Mã chĩa vua và hậu
+])
+def test_pvs_matches_alpha_beta(fen):
+    move, score, nodes = alpha_beta_reference(fen, 3)
+    plain = {name: False for name in ("lmr", "null_move", "reverse_futility", "futility", "razoring")}
+    result = minmax.Engine(hash_mb=1, **plain).search(chess.Board(fen), 3)
+    assert (result.move, result.score) == (move, score)
+    assert result.nodes < nodes
+
+
+# Test 35: Gốc tìm kiếm: biến chính bắt đầu bằng nước trả về và hợp lệ; cửa sổ aspiration hẹp phải tìm lại
+# nhưng chọn cùng nước với tìm kiếm toàn cửa sổ ở cùng độ sâu
+@pytest.mark.parametrize("fen", [
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+])
+def test_root_search(fen):
+    calls = []
+
+    class CountingEngine(minmax.Engine):
+        def search_root(self, board, depth, *args):
+            calls.append(depth)
+            return super().search_root(board, depth, *args)
+
+    narrow = CountingEngine(hash_mb=1).search(chess.Board(fen), 5, margin=1)
+    assert len(calls) > 5  # Có ít nhất một lần fail high/low phải tìm lại
+    full = minmax.Engine(hash_mb=1).search(chess.Board(fen), 5, margin=minmax.INFINITY)
+    assert narrow.move == full.move
+    for result in (narrow, full):
+        assert result.pv[0] == result.move
+        board = chess.Board(fen)
+        for move in result.pv:
+            assert move in board.legal_moves
+            board.push(move)
+
+
 # Chạy pytest bằng lệnh: pytest test_chess_bot.py
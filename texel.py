@@ -0,0 +1,240 @@
+"""
+    Texel tuning cho giá trị quân và bảng điểm vị trí của minmax.py (cần numpy).
+    Mỗi thế cờ có nhãn kết quả (1-0, 1/2-1/2, 0-1) được lưu gọn thành 10 bitboard uint64
+    (5 loại quân x 2 màu, quân đen đã lật dọc), rồi bung theo từng khối thành đặc trưng thưa
+    (chỉ số ô + dấu, tối đa 32 mỗi thế cờ). Đánh giá là tuyến tính theo trọng số
+    W[loại quân][ô] = giá trị quân + điểm vị trí, nên mỗi epoch chỉ cần một phép gather
+    và một np.bincount cho gradient của sai số (kết quả - sigmoid(K * eval)) ** 2.
+
+        python texel.py quiet-labeled.epd -o eval_params.json --epochs 300
+        python texel.py games.epd --save-features data.npz   # lưu đặc trưng để tune lại nhanh
+        python texel.py data.npz -o eval_params.json
+
+    minmax.py tự nạp eval_params.json (hoặc file trong biến môi trường CHESSBOT_EVAL_PARAMS) khi import.
+"""
+import argparse
+import json
+import math
+import sys
+import time
+
+import chess
+import numpy as np
+
+import minmax
+
+TUNED_PIECES = (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN)  # Vua luôn cân bằng, không tune
+FEATURES = len(TUNED_PIECES) * 64
+RESULTS = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+CHUNK_SIZE = 65536
+MAX_PIECES = 32  # Số ô đặc trưng tối đa mỗi thế cờ (không tính vua)
+
+
+def parse_labelled(line):
+    """
+        Một dòng 'FEN/EPD kết quả', ví dụ 'fen c9 "1-0";', 'fen [0.5]' hoặc 'fen 1/2-1/2'.
+        Trả về (board, kết quả theo góc nhìn bên trắng) hoặc None nếu không đọc được.
+    """
+    tokens = line.replace(";", " ").replace('"', " ").replace("[", " ").replace("]", " ").split()
+    if len(tokens) < 5:
+        return None
+    label = tokens[-1]
+    if label in RESULTS:
+        result = RESULTS[label]
+    else:
+        try:
+            result = float(label)
+        except ValueError:
+            return None
+    try:
+        board = chess.Board(" ".join(tokens[:4]) + " 0 1")
+    except ValueError:
+        return None
+    return board, result
+
+
+def board_bitboards(board):
+    """10 bitboard: quân trắng theo TUNED_PIECES, rồi quân đen đã lật dọc về góc nhìn bên trắng."""
+    white = [board.pieces_mask(piece_type, chess.WHITE) for piece_type in TUNED_PIECES]
+    black = [chess.flip_vertical(board.pieces_mask(piece_type, chess.BLACK)) for piece_type in TUNED_PIECES]
+    return white + black
+
+
+def load_dataset(path, limit=None):
+    """Đọc file nhãn (hoặc .npz đã lưu) thành (bitboards uint64 (N, 10), results float32 (N,))."""
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return data['bitboards'][:limit], data['results'][:limit]
+    bitboards = []
+    results = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parsed = parse_labelled(line)
+            if parsed is None:
+                continue
+            board, result = parsed
+            bitboards.append(board_bitboards(board))
+            results.append(result)
+            if limit is not None and len(results) >= limit:
+                break
+    return np.array(bitboards, dtype="<u8").reshape(-1, 10), np.array(results, dtype=np.float32)
+
+
+def save_dataset(path, bitboards, results):
+    np.savez_compressed(path, bitboards=bitboards, results=results)
+
+
+def sparse_features(bitboards, chunk_size=CHUNK_SIZE):
+    """
+        Đặc trưng dạng thưa: indices (n, MAX_PIECES) là chỉ số W[loại quân * 64 + ô], signs là +1 cho
+        quân trắng, -1 cho quân đen; ô thừa trỏ vào đặc trưng giả FEATURES có dấu 0.
+        Mỗi thế cờ chỉ có tối đa 30 quân không phải vua, nên nhỏ hơn nhiều so với ma trận đặc (n, 320).
+    """
+    n = len(bitboards)
+    indices = np.full((n, MAX_PIECES), FEATURES, dtype=np.uint16)
+    signs = np.zeros((n, MAX_PIECES), dtype=np.int8)
+    for start in range(0, n, chunk_size):
+        chunk = np.ascontiguousarray(bitboards[start:start + chunk_size], dtype="<u8")
+        bits = np.unpackbits(chunk.view(np.uint8), axis=1, bitorder="little").reshape(len(chunk), 2, FEATURES)
+        dense = bits[:, 0].astype(np.int8) - bits[:, 1].astype(np.int8)
+        rows, cols = np.nonzero(dense)
+        slots = np.arange(len(rows)) - np.searchsorted(rows, np.arange(len(chunk)))[rows]
+        if len(slots) and slots.max() >= MAX_PIECES:
+            raise ValueError("position has more than %d non-king pieces" % MAX_PIECES)
+        indices[start + rows, slots] = cols
+        signs[start + rows, slots] = dense[rows, cols]
+    return indices, signs
+
+
+def evaluate(indices, signs, weights):
+    """Điểm (góc nhìn bên trắng, không tính vua) của từng thế cờ với trọng số W."""
+    table = np.append(np.asarray(weights, dtype=np.float64).reshape(-1), 0.0)
+    return (table[indices] * signs).sum(axis=1)
+
+
+def weights_from_engine(params=None):
+    """Trọng số W (5, 64) = giá trị quân + điểm vị trí của quân trắng trên từng ô."""
+    params = params or minmax.eval_params()
+    weights = np.zeros((len(TUNED_PIECES), 64), dtype=np.float64)
+    for i, piece_type in enumerate(TUNED_PIECES):
+        table = np.array(params[minmax.SCORE_TABLES[piece_type]], dtype=np.float64).reshape(64)
+        weights[i] = table + params['piece_score'][str(piece_type)]
+    return weights
+
+
+def params_from_weights(weights):
+    """
+        Tách W thành giá trị quân (trung bình trên các ô quân đó đứng được) và bảng điểm vị trí,
+        làm tròn về số nguyên như bảng viết tay trong minmax.py.
+    """
+    params = minmax.eval_params()
+    for i, piece_type in enumerate(TUNED_PIECES):
+        reachable = weights[i][8:56] if piece_type == chess.PAWN else weights[i]
+        value = int(round(float(reachable.mean())))
+        table = np.rint(weights[i] - value).astype(int)
+        if piece_type == chess.PAWN:
+            table[:8] = table[56:] = 0  # Tốt không bao giờ đứng ở hàng 1 và hàng 8
+        params['piece_score'][str(piece_type)] = value
+        params[minmax.SCORE_TABLES[piece_type]] = table.reshape(8, 8).tolist()
+    return params
+
+
+def loss(indices, signs, results, weights, k):
+    """Sai số bình phương trung bình giữa kết quả và 1 / (1 + 10 ** (-k * eval / 400))."""
+    p = 1.0 / (1.0 + np.power(10.0, -k * evaluate(indices, signs, weights) / 400.0))
+    return float(np.mean((results - p) ** 2)) if len(results) else 0.0
+
+
+def fit_k(indices, signs, results, weights, low=0.1, high=3.0, iterations=30):
+    """Hệ số co giãn K làm sai số nhỏ nhất với trọng số hiện tại (golden-section search)."""
+    scores = evaluate(indices, signs, weights)
+
+    def error(k):
+        return float(np.mean((results - 1.0 / (1.0 + np.power(10.0, -k * scores / 400.0))) ** 2))
+
+    ratio = (math.sqrt(5) - 1) / 2
+    a, b = low, high
+    c, d = b - ratio * (b - a), a + ratio * (b - a)
+    loss_c, loss_d = error(c), error(d)
+    for _ in range(iterations):
+        if loss_c < loss_d:
+            b, d, loss_d = d, c, loss_c
+            c = b - ratio * (b - a)
+            loss_c = error(c)
+        else:
+            a, c, loss_c = c, d, loss_d
+            d = a + ratio * (b - a)
+            loss_d = error(d)
+    return (a + b) / 2
+
+
+def tune(indices, signs, results, weights=None, k=None, epochs=200, learning_rate=2.0, on_epoch=None):
+    """
+        Gradient descent (Adam) trên toàn bộ dữ liệu mỗi epoch; trả về (W (5, 64), K, sai số cuối).
+        K được cố định trước khi tune để thang điểm centipawn không bị trôi.
+    """
+    weights = weights_from_engine() if weights is None else np.array(weights, dtype=np.float64)
+    if k is None:
+        k = fit_k(indices, signs, results, weights)
+    scale = k * math.log(10) / 400
+    n = max(len(results), 1)
+    flat_indices = indices.reshape(-1)
+    flat_signs = signs.reshape(-1).astype(np.float64)
+    m = np.zeros(FEATURES)
+    v = np.zeros(FEATURES)
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    flat = weights.reshape(-1).copy()
+    for epoch in range(1, epochs + 1):
+        p = 1.0 / (1.0 + np.exp(-scale * evaluate(indices, signs, flat)))
+        error = p - results
+        # d eval / d W[f] là tổng dấu của các quân nằm ở đặc trưng f
+        per_position = error * p * (1 - p)
+        gradient = np.bincount(flat_indices, np.repeat(per_position, MAX_PIECES) * flat_signs,
+                               minlength=FEATURES + 1)[:FEATURES]
+        gradient *= 2 * scale / n
+        m = beta1 * m + (1 - beta1) * gradient
+        v = beta2 * v + (1 - beta2) * gradient ** 2
+        m_hat = m / (1 - beta1 ** epoch)
+        v_hat = v / (1 - beta2 ** epoch)
+        flat -= learning_rate * m_hat / (np.sqrt(v_hat) + epsilon)
+        if on_epoch is not None:
+            on_epoch(epoch, float(np.mean(error ** 2)))
+    weights = flat.reshape(len(TUNED_PIECES), 64)
+    return weights, k, loss(indices, signs, results, weights, k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Texel tuning of minmax.py evaluation tables")
+    parser.add_argument("data", help="file nhãn (FEN/EPD + kết quả mỗi dòng) hoặc .npz do --save-features tạo")
+    parser.add_argument("-o", "--output", default=minmax.EVAL_PARAMS_FILE)
+    parser.add_argument("--limit", type=int, default=None, help="chỉ dùng chừng này thế cờ đầu tiên")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--lr", type=float, default=2.0)
+    parser.add_argument("--k", type=float, default=None, help="bỏ qua bước tìm K")
+    parser.add_argument("--save-features", default=None, help="lưu bitboard và nhãn ra .npz rồi dừng")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    bitboards, results = load_dataset(args.data, args.limit)
+    print(f"Loaded {len(results)} positions in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    if args.save_features:
+        save_dataset(args.save_features, bitboards, results)
+        return
+
+    def progress(epoch, error):
+        if epoch % 10 == 0:
+            print(f"epoch {epoch}: loss {error:.6f}", file=sys.stderr)
+
+    indices, signs = sparse_features(bitboards)
+    results = results.astype(np.float64)
+    initial = weights_from_engine()
+    k = args.k if args.k is not None else fit_k(indices, signs, results, initial)
+    print(f"K = {k:.4f}, initial loss {loss(indices, signs, results, initial, k):.6f}", file=sys.stderr)
+    weights, k, final = tune(indices, signs, results, initial, k, args.epochs, args.lr, on_epoch=progress)
+    print(f"final loss {final:.6f} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    with open(args.output, "w") as f:
+        json.dump(params_from_weights(weights), f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import time
+
+MOVE_OVERHEAD = 0.05  # Giây dự phòng cho độ trễ giao tiếp/GUI
+DEFAULT_MOVES_TO_GO = 30
+
+
+class SearchAborted(Exception):
+    """Ném ra bên trong tìm kiếm khi hết giờ cứng hoặc có lệnh dừng."""
+
+
+class TimeManager:
+    """
+        Quản lý thời gian cho một nước đi.
+        - soft_limit: không bắt đầu vòng lặp sâu hơn khi đã dùng quá mức này.
+        - hard_limit: tìm kiếm bị huỷ ngay khi vượt quá mức này.
+        Nhận movetime (giây) hoặc thời gian còn lại trên đồng hồ cộng increment, và/hoặc
+        giới hạn số nút max_nodes. Không có giới hạn nào thì chỉ dừng khi gọi stop().
+        Khi pondering, mọi giới hạn bị bỏ qua cho tới ponderhit().
+    """
+
+    def __init__(self, movetime=None, time_left=None, increment=0.0, moves_to_go=None,
+                 move_overhead=MOVE_OVERHEAD, max_nodes=None, pondering=False):
+        self.soft_limit = None
+        self.hard_limit = None
+        if movetime is not None:
+            self.hard_limit = max(0.01, movetime - move_overhead)
+            self.soft_limit = self.hard_limit / 2
+        elif time_left is not None:
+            available = max(0.01, time_left - move_overhead)
+            moves_to_go = moves_to_go or DEFAULT_MOVES_TO_GO
+            budget = available / moves_to_go + increment * 0.75
+            self.soft_limit = min(budget, available * 0.4)
+            self.hard_limit = min(budget * 4, available * 0.8)
+        self.max_nodes = max_nodes
+        self.pondering = pondering
+        self.stopped = False
+        self.start_time = time.time()
+
+    @classmethod
+    def from_clock(cls, turn, wtime=None, btime=None, winc=0.0, binc=0.0, moves_to_go=None,
+                   move_overhead=MOVE_OVERHEAD, max_nodes=None, pondering=False):
+        """Chọn đồng hồ của bên đang đi (turn là chess.WHITE/chess.BLACK)."""
+        time_left = wtime if turn else btime
+        increment = (winc if turn else binc) or 0.0
+        return cls(time_left=time_left, increment=increment, moves_to_go=moves_to_go,
+                   move_overhead=move_overhead, max_nodes=max_nodes, pondering=pondering)
+
+    def start(self):
+        self.stopped = False
+        self.start_time = time.time()
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    def stop(self):
+        self.stopped = True
+
+    def ponderhit(self):
+        """Đối thủ đã đi đúng nước được ponder: bắt đầu tính giờ từ lúc này."""
+        self.pondering = False
+        self.start_time = time.time()
+
+    def soft_expired(self, nodes=0):
+        if self.stopped:
+            return True
+        if self.pondering:
+            return False
+        return ((self.soft_limit is not None and self.elapsed() >= self.soft_limit)
+                or (self.max_nodes is not None and nodes >= self.max_nodes))
+
+    def hard_expired(self, nodes=0):
+        if self.stopped:
+            return True
+        if self.pondering:
+            return False
+        return ((self.hard_limit is not None and self.elapsed() >= self.hard_limit)
+                or (self.max_nodes is not None and nodes >= self.max_nodes))
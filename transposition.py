@@ -0,0 +1,154 @@
+from array import array
+
+import chess
+
+# Loại giá trị lưu trong bảng; 0 nghĩa là ô trống
+BOUND_LOWER = 1
+BOUND_UPPER = 2
+BOUND_EXACT = BOUND_LOWER | BOUND_UPPER
+
+ENTRY_SIZE = 16  # 8 byte khoá + 8 byte dữ liệu đã đóng gói
+BUCKET_SIZE = 2  # ô 0: ưu tiên độ sâu, ô 1: luôn thay thế
+
+GENERATION_MASK = 0x3F
+
+
+def encode_move(move):
+    """Đóng gói nước đi vào 15 bit: from | to << 6 | promotion << 12 (0 = không có nước đi)."""
+    if not move:
+        return 0
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def decode_move(code):
+    if not code:
+        return None
+    return chess.Move(code & 0x3F, (code >> 6) & 0x3F, (code >> 12) or None)
+
+
+def table_size(hash_mb):
+    """Số byte thực sự dùng cho bảng hash_mb MB (số bucket làm tròn xuống lũy thừa của 2)."""
+    entries = max(BUCKET_SIZE, int(hash_mb * 1024 * 1024) // ENTRY_SIZE)
+    buckets = 1 << ((entries // BUCKET_SIZE).bit_length() - 1)
+    return buckets * BUCKET_SIZE * ENTRY_SIZE
+
+
+class TranspositionTable:
+    """
+        Bảng chuyển vị kích thước cố định (tính theo MB), lưu trong hai mảng cấp phát sẵn
+        (lazy=True: cấp phát ở lần tìm kiếm đầu tiên, để import nhanh).
+        Mỗi ô gồm khoá Zobrist và một số 64 bit đóng gói:
+        value (32 bit) | depth (8 bit) | bound (2 bit) | move (16 bit) | generation (6 bit).
+        Khoá được lưu dưới dạng key ^ data nên một ô bị ghi dở bởi tiến trình khác
+        (khi buffer là shared memory) chỉ đơn giản là không khớp khi probe.
+    """
+
+    def __init__(self, hash_mb=16, buffer=None, lazy=False):
+        self.buffer = buffer
+        self.keys = self.data = None
+        self.lazy = lazy and buffer is None
+        self.resize(hash_mb)
+
+    def resize(self, hash_mb):
+        if self.lazy and self.keys is None:
+            # Chưa dùng tới: chỉ ghi nhận kích thước, cấp phát ở lần new_search() đầu tiên
+            self.hash_mb = hash_mb
+            self.mask = 0
+            self.generation = 0
+            return
+        self._allocate(hash_mb)
+
+    def _allocate(self, hash_mb):
+        size = table_size(hash_mb)
+        words = size // 16
+        if self.buffer is None:
+            self.keys = array('Q', bytes(8 * words))
+            self.data = array('Q', bytes(8 * words))
+        else:
+            view = memoryview(self.buffer)
+            if len(view) < size:
+                raise ValueError(f"buffer of {len(view)} bytes is too small for a {hash_mb} MB table")
+            self.keys = view[:8 * words].cast('Q')
+            self.data = view[8 * words:size].cast('Q')
+        self.hash_mb = hash_mb
+        self.mask = words // BUCKET_SIZE - 1
+        self.generation = 0
+
+    def clear(self):
+        if self.buffer is None:
+            if self.keys is not None:
+                self._allocate(self.hash_mb)
+        else:
+            size = table_size(self.hash_mb)
+            self.buffer[:size] = bytes(size)
+            self.generation = 0
+
+    def release(self):
+        """Bỏ mọi tham chiếu tới buffer ngoài (cần trước khi đóng shared memory)."""
+        if self.buffer is not None:
+            self.keys.release()
+            self.data.release()
+            self.keys = self.data = None
+            self.buffer = None
+
+    def new_search(self):
+        """Tăng thế hệ trước mỗi lần tìm kiếm để các ô cũ được ưu tiên thay thế."""
+        if self.keys is None:
+            self._allocate(self.hash_mb)
+        self.generation = (self.generation + 1) & GENERATION_MASK
+
+    def __len__(self):
+        return len(self.keys) if self.keys is not None else 0
+
+    def probe(self, key):
+        """Trả về (value, depth, bound, move) hoặc None nếu không có khoá này."""
+        index = (key & self.mask) << 1
+        keys = self.keys
+        data = self.data[index]
+        if keys[index] ^ data != key:
+            data = self.data[index + 1]
+            if keys[index + 1] ^ data != key:
+                return None
+        bound = (data >> 40) & 0x3
+        if not bound:
+            return None
+        value = data & 0xFFFFFFFF
+        if value & 0x80000000:
+            value -= 0x100000000
+        return value, (data >> 32) & 0xFF, bound, (data >> 42) & 0xFFFF
+
+    def store(self, key, value, depth, bound, move=0):
+        index = (key & self.mask) << 1
+        keys = self.keys
+        data = self.data
+
+        if keys[index] ^ data[index] == key:
+            slot = index
+        elif keys[index + 1] ^ data[index + 1] == key:
+            slot = index + 1
+        else:
+            old = data[index]
+            old_depth = (old >> 32) & 0xFF
+            old_generation = old >> 58
+            # Ô ưu tiên độ sâu chỉ bị thay khi ô cũ thuộc lần tìm kiếm trước hoặc nông hơn
+            if old_generation != self.generation or depth >= old_depth or not (old >> 40) & 0x3:
+                slot = index
+            else:
+                slot = index + 1
+
+        if not move and keys[slot] ^ data[slot] == key:
+            move = (data[slot] >> 42) & 0xFFFF  # Giữ lại nước đi tốt nhất cũ
+        depth = min(max(depth, 0), 0xFF)
+        packed = ((value & 0xFFFFFFFF) | depth << 32 | bound << 40 | move << 42
+                  | self.generation << 58)
+        data[slot] = packed
+        keys[slot] = key ^ packed
+
+    def hashfull(self):
+        """Phần nghìn số ô đã dùng trong lần tìm kiếm hiện tại (lấy mẫu 1000 ô đầu)."""
+        if self.data is None:
+            return 0
+        sample = min(1000, len(self.data))
+        data = self.data
+        used = sum(1 for i in range(sample) if (data[i] >> 40) & 0x3 and data[i] >> 58 == self.generation)
+        return used * 1000 // sample
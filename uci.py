@@ -0,0 +1,253 @@
+"""
+    Giao tiếp UCI qua stdin/stdout để chạy bot trong GUI, cutechess-cli hoặc
+    chess.engine.SimpleEngine.popen_uci([sys.executable, "uci.py"]).
+    Tìm kiếm chạy trong một luồng riêng để vẫn nhận được stop/ponderhit/isready.
+"""
+import sys
+import threading
+import time
+
+import chess
+
+import minmax
+from book import PolyglotBook
+from tablebase import Tablebase
+from timeman import TimeManager
+
+ENGINE_NAME = "ChessBot"
+ENGINE_AUTHOR = "LeHoaiNam756"
+
+MAX_HASH_MB = 4096
+MAX_THREADS = 64
+MAX_CONTEMPT = 100
+
+# Tham số số nguyên của lệnh go mà engine dùng; "searchmoves" chưa hỗ trợ nên danh sách nước đi bị bỏ qua
+GO_PARAMS = ("wtime", "btime", "winc", "binc", "movestogo", "depth", "nodes", "movetime")
+GO_KEYWORDS = GO_PARAMS + ("searchmoves", "ponder", "infinite", "mate")
+
+
+class UciEngine:
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self.output_lock = threading.Lock()
+        self.board = chess.Board()
+        self.hash_mb = minmax.HASH_MB
+        self.engine = minmax.Engine(self.hash_mb)
+        self.threads = 1
+        self.book = None
+        self.manager = None
+        self.search_thread = None
+        self.stop_event = threading.Event()  # Với go infinite/ponder: chờ stop trước khi trả bestmove
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def handle(self, line):
+        """Xử lý một lệnh UCI; trả về False khi gặp quit."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(f"option name Hash type spin default {minmax.HASH_MB} min 1 max {MAX_HASH_MB}")
+            self.send(f"option name Threads type spin default 1 min 1 max {MAX_THREADS}")
+            self.send("option name Ponder type check default false")
+            self.send("option name BookFile type string default <empty>")
+            self.send("option name SyzygyPath type string default <empty>")
+            self.send(f"option name Contempt type spin default {minmax.DEFAULT_OPTIONS['contempt']} "
+                      f"min -{MAX_CONTEMPT} max {MAX_CONTEMPT}")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.stop_search()
+            self.engine.new_game()
+            if self.threads > 1:
+                from smp import get_pool
+                get_pool(self.threads, self.hash_mb).clear()
+        elif command == "setoption":
+            self.stop_search()
+            self.set_option(args)
+        elif command == "position":
+            self.stop_search()
+            self.set_position(args)
+        elif command == "go":
+            self.stop_search()
+            self.go(args)
+        elif command == "stop":
+            self.stop_search()
+        elif command == "ponderhit":
+            if self.manager is not None:
+                self.manager.ponderhit()
+        elif command == "quit":
+            self.stop_search()
+            return False
+        return True
+
+    def set_option(self, args):
+        """setoption name <tên> value <giá trị>; giá trị không hợp lệ bị bỏ qua, vòng lặp UCI vẫn chạy."""
+        if "name" not in args:
+            return
+        value_index = args.index("value") if "value" in args else len(args)
+        name = " ".join(args[args.index("name") + 1:value_index]).lower()
+        value = " ".join(args[value_index + 1:])
+        try:
+            self._apply_option(name, value)
+        except (ValueError, OSError) as error:
+            self.send(f"info string ignoring option {name} = {value!r}: {error}")
+
+    def _apply_option(self, name, value):
+        if name == "hash":
+            self.hash_mb = max(1, min(MAX_HASH_MB, int(value)))
+            self.engine.set_hash_size(self.hash_mb)
+        elif name == "threads":
+            self.threads = max(1, min(MAX_THREADS, int(value)))
+        elif name == "bookfile":
+            if self.book is not None:
+                self.book.close()
+            self.book = PolyglotBook(value) if value and value != "<empty>" else None
+        elif name == "syzygypath":
+            if self.engine.tablebase is not None:
+                self.engine.tablebase.close()
+            self.engine.set_tablebase(Tablebase(value) if value and value != "<empty>" else None)
+        elif name == "contempt":
+            self.engine.set_option('contempt', max(-MAX_CONTEMPT, min(MAX_CONTEMPT, int(value))))
+
+    def set_position(self, args):
+        """
+            position startpos|fen <FEN> [moves ...]. FEN không hợp lệ thì giữ thế cờ cũ; nước đi không
+            hợp lệ thì dừng ở thế cờ ngay trước nó (các nước sau phụ thuộc vào nó nên cũng bị bỏ).
+        """
+        if not args:
+            return
+        moves_index = args.index("moves") if "moves" in args else len(args)
+        try:
+            if args[0] == "startpos":
+                board = chess.Board()
+            elif args[0] == "fen":
+                board = chess.Board(" ".join(args[1:moves_index]))
+            else:
+                return
+        except ValueError as error:
+            self.send(f"info string ignoring invalid position: {error}")
+            return
+        for uci_move in args[moves_index + 1:]:
+            try:
+                board.push_uci(uci_move)
+            except ValueError:
+                self.send(f"info string ignoring illegal move {uci_move} and the moves after it")
+                break
+        self.board = board
+
+    def go(self, args):
+        params = {}
+        flags = set()
+        i = 0
+        while i < len(args):
+            token = args[i]
+            i += 1
+            if token in ("infinite", "ponder"):
+                flags.add(token)
+            elif token == "searchmoves":
+                while i < len(args) and args[i] not in GO_KEYWORDS:
+                    i += 1
+            elif token in GO_PARAMS and i < len(args):
+                try:
+                    params[token] = int(args[i])
+                except ValueError:
+                    continue
+                i += 1
+
+        ms = 1000.0
+        if "movetime" in params:
+            manager = TimeManager(movetime=params["movetime"] / ms, max_nodes=params.get("nodes"),
+                                  pondering="ponder" in flags)
+        else:
+            clock = {key: params[key] / ms for key in ("wtime", "btime", "winc", "binc") if key in params}
+            manager = TimeManager.from_clock(self.board.turn, clock.get("wtime"), clock.get("btime"),
+                                             clock.get("winc", 0.0), clock.get("binc", 0.0),
+                                             params.get("movestogo"), max_nodes=params.get("nodes"),
+                                             pondering="ponder" in flags)
+        max_depth = params.get("depth", minmax.MAX_PLY)
+        wait_for_stop = bool(flags)
+
+        self.manager = manager
+        self.stop_event.clear()
+        self.search_thread = threading.Thread(target=self._search, daemon=True,
+                                              args=(self.board.copy(), max_depth, manager, wait_for_stop))
+        self.search_thread.start()
+
+    def _search(self, board, max_depth, manager, wait_for_stop):
+        # GUI luôn chờ bestmove: nếu tìm kiếm lỗi giữa chừng vẫn trả một nước hợp lệ
+        move = next(iter(board.legal_moves), None)
+        ponder_move = None
+        try:
+            move, ponder_move = self._run_search(board, max_depth, manager, wait_for_stop)
+        finally:
+            if move is None:
+                self.send("bestmove 0000")
+            elif ponder_move is not None:
+                self.send(f"bestmove {move.uci()} ponder {ponder_move.uci()}")
+            else:
+                self.send(f"bestmove {move.uci()}")
+
+    def _run_search(self, board, max_depth, manager, wait_for_stop):
+        """Tìm kiếm (hoặc lấy nước trong sách khai cuộc); trả về (nước đi, nước ponder)."""
+        book_move = self.book.choose(board) if self.book is not None and not wait_for_stop else None
+        if book_move is not None:
+            return book_move, None
+        if self.threads > 1:
+            from smp import get_pool
+            searcher = get_pool(self.threads, self.hash_mb)
+            searcher.engine.set_tablebase(self.engine.tablebase)
+            searcher.engine.options.update(self.engine.options)
+            table = searcher.table
+        else:
+            searcher = self.engine
+            table = self.engine.transposition_table
+        start = time.time()
+
+        def info(result):
+            elapsed = max(time.time() - start, 1e-3)
+            pv = " ".join(move.uci() for move in result.pv)
+            self.send(f"info depth {result.depth} score {minmax.format_score(result.score)} nodes {result.nodes} "
+                      f"nps {int(result.nodes / elapsed)} time {int(elapsed * 1000)} "
+                      f"hashfull {table.hashfull()} pv {pv}")
+
+        result = searcher.search(board, max_depth, manager=manager, on_iteration=info)
+
+        # Với go infinite/ponder, UCI yêu cầu chờ stop (hoặc ponderhit) mới trả bestmove
+        while wait_for_stop and manager.pondering and not self.stop_event.is_set():
+            self.stop_event.wait(0.01)
+        if wait_for_stop and manager.max_nodes is None and manager.hard_limit is None:
+            self.stop_event.wait()
+
+        return result.move, result.pv[1] if result.move is not None and len(result.pv) > 1 else None
+
+    def stop_search(self):
+        if self.search_thread is None:
+            return
+        self.stop_event.set()
+        if self.manager is not None:
+            self.manager.stop()
+        self.search_thread.join()
+        self.search_thread = None
+        self.manager = None
+
+    def loop(self, stream=sys.stdin):
+        for line in stream:
+            if not self.handle(line.strip()):
+                break
+
+
+def main():
+    UciEngine().loop()
+
+
+if __name__ == "__main__":
+    main()
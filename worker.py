@@ -0,0 +1,88 @@
+"""
+    Chạy tìm kiếm trong một luồng nền để giao diện không bị treo.
+    TimeManager của mỗi lần tìm kiếm đóng vai trò token huỷ: cancel() gọi manager.stop().
+    Hỗ trợ ponder: tìm trước trên nước đáp dự đoán trong lúc người chơi suy nghĩ,
+    nếu người chơi đi đúng nước đó thì ponderhit() tiếp tục ngay trên công việc đã làm.
+"""
+import threading
+
+import minmax
+from timeman import TimeManager
+
+
+class SearchWorker:
+    def __init__(self, max_depth=6, movetime=None, engine=None):
+        self.engine = engine or minmax.Engine()  # Mỗi worker một engine, không đụng tới engine mặc định
+        self.max_depth = max_depth
+        self.movetime = movetime or minmax.MAX_TIME
+        self.lock = threading.Lock()
+        self.thread = None
+        self.manager = None
+        self.info = None  # SearchResult của vòng lặp gần nhất (depth, score, pv) để hiển thị
+        self.result = None
+        self.ponder_move = None  # Nước đáp đang được ponder, None nếu không ponder
+
+    @property
+    def busy(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    @property
+    def pondering(self):
+        return self.ponder_move is not None
+
+    def _run(self, board, manager):
+        def on_iteration(result):
+            with self.lock:
+                self.info = result
+
+        result = self.engine.search(board, self.max_depth, manager=manager, on_iteration=on_iteration)
+        with self.lock:
+            self.result = result
+
+    def _start(self, board, manager):
+        self.cancel()
+        self.info = self.result = None
+        self.manager = manager
+        self.thread = threading.Thread(target=self._run, args=(board.copy(), manager), daemon=True)
+        self.thread.start()
+
+    def start(self, board):
+        """Bắt đầu tìm nước đi cho bên đang đi của board."""
+        self.ponder_move = None
+        self._start(board, TimeManager(movetime=self.movetime))
+
+    def ponder(self, board, expected_move):
+        """Tìm trước trên thế cờ sau nước đáp dự đoán expected_move; không giới hạn giờ tới ponderhit()."""
+        ponder_board = board.copy()
+        ponder_board.push(expected_move)
+        self._start(ponder_board, TimeManager(movetime=self.movetime, pondering=True))
+        self.ponder_move = expected_move
+
+    def opponent_moved(self, board, move):
+        """
+            Gọi sau khi đối thủ đi move (board đã gồm move). Đúng nước đang ponder thì tính giờ
+            từ bây giờ và dùng tiếp tìm kiếm đang chạy; sai thì huỷ và tìm lại từ đầu
+            (bảng chuyển vị vẫn giữ phần việc đã làm).
+        """
+        if self.ponder_move is not None and move == self.ponder_move:
+            self.ponder_move = None
+            self.manager.ponderhit()
+        else:
+            self.start(board)
+
+    def take_result(self):
+        """Nước đi đã tìm xong (SearchResult) hoặc None nếu vẫn đang tìm hay đang ponder."""
+        if self.pondering or self.busy:
+            return None
+        with self.lock:
+            result, self.result = self.result, None
+        return result
+
+    def cancel(self):
+        if self.manager is not None:
+            self.manager.stop()
+        if self.thread is not None:
+            self.thread.join()
+        self.thread = None
+        self.manager = None
+        self.ponder_move = None